@@ -0,0 +1,139 @@
+# Catálogo de livros somente leitura, mapeado em memória
+
+"""
+Um catálogo grande em JSON precisaria ser lido e convertido em dicts em
+todo processo (worker) do servidor, na inicialização.
+
+Aqui o catálogo é convertido UMA vez para um arquivo binário e depois
+aberto com `mmap`. O sistema operacional carrega as páginas do arquivo sob
+demanda e as compartilha entre todos os workers (page cache), então a
+inicialização é quase instantânea e a memória de cada worker não cresce.
+
+Os livros só são decodificados quando acessados - e campo a campo: filtrar
+por ano lê apenas o índice, sem decodificar nenhum título.
+
+Formato do arquivo:
+- cabeçalho: assinatura (8 bytes) + quantidade de livros (uint64)
+- índice: uma entrada de tamanho fixo por livro, ordenado por id
+  (id, ano, tamanho do título, posição dos textos, tamanho do autor)
+- textos: título e autor de cada livro em UTF-8, um após o outro
+
+Para gerar o arquivo a partir de um JSON com a lista de livros
+(a partir da raiz do projeto):
+    uv run python 02-rotas-get/catalogo_binario.py livros.json livros.bin
+"""
+
+import json
+import mmap
+import struct
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import Iterable, Optional
+
+ASSINATURA = b"LIVROS1\0"
+CABECALHO = struct.Struct("<8sQ")
+# id, ano, tamanho do título, posição dos textos, tamanho do autor (32 bytes)
+ENTRADA = struct.Struct("<qiIQI4x")
+
+CAMPOS = ("id", "titulo", "autor", "ano")
+
+
+def escrever_catalogo(livros: Iterable[dict], caminho: str) -> int:
+    """Gera o arquivo binário; retorna a quantidade de livros gravados"""
+    livros = sorted(livros, key=lambda livro: livro["id"])
+    inicio_textos = CABECALHO.size + ENTRADA.size * len(livros)
+
+    indice = bytearray()
+    textos = bytearray()
+    for livro in livros:
+        titulo = livro["titulo"].encode()
+        autor = livro["autor"].encode()
+        indice += ENTRADA.pack(
+            livro["id"], livro["ano"], len(titulo), inicio_textos + len(textos), len(autor)
+        )
+        textos += titulo + autor
+
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(ASSINATURA, len(livros)))
+        arquivo.write(indice)
+        arquivo.write(textos)
+    return len(livros)
+
+
+class LivroMapeado(Mapping):
+    """Um livro do catálogo; cada campo é lido do arquivo só quando acessado"""
+
+    __slots__ = ("_dados", "_posicao")
+
+    def __init__(self, dados: mmap.mmap, posicao: int):
+        self._dados = dados
+        self._posicao = posicao
+
+    def __getitem__(self, campo: str):
+        livro_id, ano, tamanho_titulo, inicio, tamanho_autor = ENTRADA.unpack_from(
+            self._dados, self._posicao
+        )
+        if campo == "id":
+            return livro_id
+        if campo == "ano":
+            return ano
+        if campo == "titulo":
+            return self._dados[inicio:inicio + tamanho_titulo].decode()
+        if campo == "autor":
+            inicio += tamanho_titulo
+            return self._dados[inicio:inicio + tamanho_autor].decode()
+        raise KeyError(campo)
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    def __len__(self):
+        return len(CAMPOS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CatalogoMapeado(Sequence):
+    """Lista de livros somente leitura apoiada em um arquivo mapeado em memória"""
+
+    def __init__(self, caminho: str):
+        with open(caminho, "rb") as arquivo:
+            # O mmap continua válido depois que o arquivo é fechado
+            self._dados = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assinatura, self._quantidade = CABECALHO.unpack_from(self._dados, 0)
+        if assinatura != ASSINATURA:
+            raise ValueError(f"{caminho} não é um catálogo de livros válido")
+
+    def __len__(self):
+        return self._quantidade
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(self._quantidade))]
+        if indice < 0:
+            indice += self._quantidade
+        if not 0 <= indice < self._quantidade:
+            raise IndexError("índice fora do catálogo")
+        return LivroMapeado(self._dados, CABECALHO.size + indice * ENTRADA.size)
+
+    def _id_na_posicao(self, indice: int) -> int:
+        return ENTRADA.unpack_from(self._dados, CABECALHO.size + indice * ENTRADA.size)[0]
+
+    def obter(self, livro_id: int) -> Optional[LivroMapeado]:
+        """Busca binária pelo id (o índice está ordenado), sem percorrer o catálogo"""
+        indice = bisect_left(range(self._quantidade), livro_id, key=self._id_na_posicao)
+        if indice < self._quantidade and self._id_na_posicao(indice) == livro_id:
+            return self[indice]
+        return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Uso: python catalogo_binario.py <livros.json> <livros.bin>")
+
+    with open(sys.argv[1], encoding="utf-8") as entrada:
+        total = escrever_catalogo(json.load(entrada), sys.argv[2])
+    print(f"{total} livros gravados em {sys.argv[2]}")
@@ -1,6 +1,8 @@
 # Etapa 02: Rotas GET - Trabalhando com parâmetros
+import os
 
 from fastapi import FastAPI
+from catalogo_binario import CatalogoMapeado
 
 app = FastAPI(
     title="API de Livros",
@@ -16,6 +18,11 @@ livros = [
     {"id": 3, "titulo": "Automatize tarefas maçantes", "autor": "Al Sweigart", "ano": 2019},
 ]
 
+# Para um catálogo grande, aponte CATALOGO_LIVROS para um arquivo gerado por
+# catalogo_binario.py: ele é mapeado em memória e lido sob demanda
+if os.environ.get("CATALOGO_LIVROS"):
+    livros = CatalogoMapeado(os.environ["CATALOGO_LIVROS"])
+
 
 @app.get("/")
 def raiz():
@@ -33,7 +40,7 @@ def raiz():
 @app.get("/livros")
 def listar_livros():
     """Lista todos os livros disponíveis"""
-    return {"total": len(livros), "livros": livros}
+    return {"total": len(livros), "livros": list(livros)}
 
 
 @app.get("/livros/{livro_id}")
@@ -45,6 +52,11 @@ def obter_livro(livro_id: int):
 
     Este é um exemplo de Path Parameter - o parâmetro faz parte da URL
     """
+    # No catálogo binário, os IDs estão ordenados: busca binária
+    if isinstance(livros, CatalogoMapeado):
+        livro = livros.obter(livro_id)
+        return livro if livro is not None else {"erro": "Livro não encontrado"}
+
     # Busca o livro na lista
     for livro in livros:
         if livro["id"] == livro_id:
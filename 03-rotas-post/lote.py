@@ -0,0 +1,159 @@
+# Operações em lote sobre as tarefas
+
+"""
+Marcar 500 tarefas como concluídas não deveria exigir 500 requisições,
+cada uma percorrendo a lista inteira.
+
+`POST /tarefas/lote` recebe uma lista de operações e aplica todas em UMA
+passada pela lista de tarefas:
+
+- `atualizar`: altera alguns campos da tarefa com o `id` informado
+- `deletar`: remove a tarefa com o `id` informado
+- `deletar_onde`: remove as tarefas que combinam com o filtro
+  (ex.: todas com `concluida=true`)
+
+Para cada tarefa, as operações que a afetam são aplicadas na ordem em que
+aparecem no lote. A resposta traz um resultado por operação.
+"""
+
+from typing import Annotated, Callable, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class CamposTarefa(BaseModel):
+    """Campos que podem ser alterados em lote (todos opcionais)"""
+    titulo: Optional[str] = None
+    descricao: Optional[str] = None
+    concluida: Optional[bool] = None
+
+
+class FiltroTarefa(BaseModel):
+    """Condição para remover tarefas; campos ausentes não são comparados"""
+    concluida: Optional[bool] = None
+    titulo: Optional[str] = None
+
+    @model_validator(mode="after")
+    def pelo_menos_um_campo(self):
+        """Um filtro vazio apagaria todas as tarefas"""
+        if self.concluida is None and self.titulo is None:
+            raise ValueError("Informe pelo menos um campo no filtro")
+        return self
+
+
+class OperacaoAtualizar(BaseModel):
+    operacao: Literal["atualizar"]
+    id: int
+    campos: CamposTarefa
+
+
+class OperacaoDeletar(BaseModel):
+    operacao: Literal["deletar"]
+    id: int
+
+
+class OperacaoDeletarOnde(BaseModel):
+    operacao: Literal["deletar_onde"]
+    filtro: FiltroTarefa
+
+
+# O campo "operacao" diz ao Pydantic qual modelo usar para cada item
+Operacao = Annotated[
+    Union[OperacaoAtualizar, OperacaoDeletar, OperacaoDeletarOnde],
+    Field(discriminator="operacao"),
+]
+
+
+class Lote(BaseModel):
+    """Lista de operações a aplicar de uma vez"""
+    operacoes: list[Operacao] = Field(..., min_length=1, max_length=10_000)
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "operacoes": [
+                        {"operacao": "atualizar", "id": 1, "campos": {"concluida": True}},
+                        {"operacao": "deletar", "id": 2},
+                        {"operacao": "deletar_onde", "filtro": {"concluida": True}},
+                    ]
+                }
+            ]
+        }
+    }
+
+
+def _combina(tarefa, filtro: dict) -> bool:
+    return all(getattr(tarefa, campo) == valor for campo, valor in filtro.items())
+
+
+def aplicar_lote(tarefas: list, lote: Lote, publicar: Callable[[str, dict], None]) -> list[dict]:
+    """
+    Aplica o lote percorrendo `tarefas` uma única vez (altera a lista)
+
+    Quem chama deve segurar o lock que protege `tarefas`: uma tarefa criada
+    durante a passada se perderia na troca do conteúdo no final.
+    `publicar(tipo, tarefa)` é chamado para cada tarefa alterada ou removida.
+    Retorna um resultado para cada operação, na ordem do lote.
+    """
+    # Índices: operações por id (busca O(1)) e operações por filtro
+    por_id: dict[int, list[int]] = {}
+    por_filtro: list[int] = []
+    filtros: dict[int, dict] = {}
+    campos: dict[int, dict] = {}
+    resultados: list[dict] = []
+
+    for i, op in enumerate(lote.operacoes):
+        if op.operacao == "deletar_onde":
+            por_filtro.append(i)
+            filtros[i] = op.filtro.model_dump(exclude_none=True)
+            resultados.append({"operacao": op.operacao, "removidas": 0, "ids": []})
+        else:
+            por_id.setdefault(op.id, []).append(i)
+            if op.operacao == "atualizar":
+                campos[i] = op.campos.model_dump(exclude_none=True)
+            resultados.append({
+                "operacao": op.operacao, "id": op.id,
+                "sucesso": False, "erro": "Tarefa não encontrada",
+            })
+
+    mantidas = []
+    for tarefa in tarefas:
+        indices = por_id.get(tarefa.id, [])
+        if por_filtro:
+            indices = sorted(indices + por_filtro)
+
+        alterada = False
+        removida = False
+        for i in indices:
+            op = lote.operacoes[i]
+            if op.operacao == "atualizar":
+                for campo, valor in campos[i].items():
+                    setattr(tarefa, campo, valor)
+                alterada = True
+            elif op.operacao == "deletar":
+                removida = True
+            elif _combina(tarefa, filtros[i]):
+                resultados[i]["removidas"] += 1
+                resultados[i]["ids"].append(tarefa.id)
+                removida = True
+            else:
+                continue
+
+            if op.operacao != "deletar_onde":
+                resultados[i]["sucesso"] = True
+                del resultados[i]["erro"]
+            if removida:
+                # Operações seguintes para esta tarefa a encontram removida
+                break
+
+        if removida:
+            publicar("removida", tarefa.para_dict())
+        else:
+            if alterada:
+                publicar("atualizada", tarefa.para_dict())
+            mantidas.append(tarefa)
+
+    # Troca o conteúdo em vez da lista, para quem já tem a referência
+    tarefas[:] = mantidas
+    return resultados
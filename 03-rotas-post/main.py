@@ -1,9 +1,24 @@
 # Etapa 03: Rotas POST - Recebendo dados do cliente
+import sys
+from pathlib import Path
+
+# Os módulos de compartilhado/ (na raiz do projeto) são usados por várias etapas
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import threading
+from dataclasses import dataclass
 from http import HTTPStatus
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from lote import Lote, aplicar_lote
+from mudancas import FeedDeMudancas
 from pydantic import BaseModel
 
+from compartilhado.idempotencia import CacheIdempotencia
+from compartilhado.openapi_cache import usar_openapi_precomputado
+
 app = FastAPI(
     title="API de Tarefas",
     description="Uma API para gerenciar suas tarefas diárias",
@@ -35,12 +50,43 @@ class Tarefa(BaseModel):
     }
 
 
+@dataclass(slots=True)
+class RegistroTarefa:
+    """
+    Tarefa guardada no "banco de dados"
+
+    Com __slots__ cada registro ocupa bem menos memória que um dict, pois
+    não repete as chaves em todo registro. O dict só é criado na resposta.
+    """
+    titulo: str
+    descricao: str
+    concluida: bool
+    id: int
+
+    def para_dict(self) -> dict:
+        return {
+            "titulo": self.titulo,
+            "descricao": self.descricao,
+            "concluida": self.concluida,
+            "id": self.id,
+        }
+
+
 # ===== "BANCO DE DADOS" =====
 # Em memória - será perdido quando reiniciar o servidor
 # Em produção, você usaria um banco de dados real
-tarefas = []
+tarefas: list[RegistroTarefa] = []
 proximo_id = 1
 
+# As rotas síncronas rodam em threads: toda escrita em `tarefas` passa por aqui
+lock_tarefas = threading.Lock()
+
+# Um POST /tarefas repetido com o mesmo Idempotency-Key não cria outra tarefa
+idempotencia = CacheIdempotencia()
+
+# Feed de mudanças para quem acompanha as tarefas em tempo real
+feed = FeedDeMudancas()
+
 
 # ===== ROTAS =====
 
@@ -54,6 +100,8 @@ def raiz():
             "listar": "GET /tarefas",
             "criar": "POST /tarefas",
             "obter": "GET /tarefas/{id}",
+            "mudancas": "GET /tarefas/changes",
+            "lote": "POST /tarefas/lote",
         }
     }
 
@@ -63,22 +111,51 @@ def listar_tarefas():
     """Lista todas as tarefas"""
     return {
         "total": len(tarefas),
-        "tarefas": tarefas
+        "tarefas": [tarefa.para_dict() for tarefa in tarefas]
     }
 
 
+# Precisa vir antes de /tarefas/{tarefa_id}, senão "changes" seria lido como ID
+@app.get("/tarefas/changes")
+async def acompanhar_tarefas(
+    desde: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Acompanha as mudanças nas tarefas em tempo real (Server-Sent Events)
+
+    Eventos: `criada`, `atualizada` e `removida`, cada um com um número de
+    sequência. Para retomar de onde parou, envie a última sequência recebida
+    em `?desde=` ou no header `Last-Event-ID`. Um evento `reset` indica que
+    a lista completa deve ser recarregada.
+
+    No navegador: `new EventSource("/tarefas/changes")`
+    """
+    inicio = last_event_id if last_event_id is not None else desde
+    return StreamingResponse(
+        feed.assinar(inicio),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/tarefas/{tarefa_id}")
 def obter_tarefa(tarefa_id: int):
     """Obtém uma tarefa específica pelo ID"""
     for tarefa in tarefas:
-        if tarefa["id"] == tarefa_id:
-            return tarefa
+        if tarefa.id == tarefa_id:
+            return tarefa.para_dict()
 
     return {"erro": "Tarefa não encontrada"}
 
 
 @app.post("/tarefas", status_code=HTTPStatus.CREATED,)
-def criar_tarefa(tarefa: Tarefa):
+def criar_tarefa(
+    tarefa: Tarefa,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Cria uma nova tarefa
 
@@ -86,22 +163,49 @@ def criar_tarefa(tarefa: Tarefa):
     - titulo: string (obrigatório)
     - descricao: string (obrigatório)
     - concluida: boolean (opcional, padrão: false)
+
+    E, opcionalmente, o header Idempotency-Key: repetir a requisição com
+    a mesma chave devolve a resposta original em vez de criar outra tarefa.
     """
-    global proximo_id
+    def criar():
+        global proximo_id
 
-    # Converte o modelo Pydantic para dicionário
-    nova_tarefa = tarefa.model_dump()
+        with lock_tarefas:
+            # Converte o modelo Pydantic para um registro compacto, com o ID
+            nova_tarefa = RegistroTarefa(**tarefa.model_dump(), id=proximo_id)
+            proximo_id += 1
 
-    # Adiciona o ID
-    nova_tarefa["id"] = proximo_id
-    proximo_id += 1
+            # Adiciona à lista
+            tarefas.append(nova_tarefa)
+            feed.publicar("criada", nova_tarefa.para_dict())
 
-    # Adiciona à lista
-    tarefas.append(nova_tarefa)
+        return {
+            "mensagem": "Tarefa criada com sucesso!",
+            "tarefa": nova_tarefa.para_dict()
+        }
+
+    return idempotencia.responder("tarefas", request, idempotency_key, tarefa, response, criar)
+
+
+@app.post("/tarefas/lote")
+def processar_lote(lote: Lote):
+    """
+    Aplica várias operações de uma vez, em uma única passada pela lista
+
+    Cada item de **operacoes** pode ser:
+    - `{"operacao": "atualizar", "id": 1, "campos": {"concluida": true}}`
+    - `{"operacao": "deletar", "id": 2}`
+    - `{"operacao": "deletar_onde", "filtro": {"concluida": true}}`
+
+    A resposta traz um resultado para cada operação, na mesma ordem.
+    """
+    with lock_tarefas:
+        resultados = aplicar_lote(tarefas, lote, feed.publicar)
 
     return {
-        "mensagem": "Tarefa criada com sucesso!",
-        "tarefa": nova_tarefa
+        "mensagem": "Lote processado!",
+        "total_operacoes": len(resultados),
+        "resultados": resultados
     }
 
 
@@ -113,16 +217,17 @@ def atualizar_tarefa(tarefa_id: int, tarefa_atualizada: Tarefa):
     - **tarefa_id**: ID da tarefa a atualizar
     - **tarefa_atualizada**: Novos dados da tarefa
     """
-    for i, tarefa in enumerate(tarefas):
-        if tarefa["id"] == tarefa_id:
-            # Atualiza mantendo o ID original
-            tarefas[i] = tarefa_atualizada.model_dump()
-            tarefas[i]["id"] = tarefa_id
-
-            return {
-                "mensagem": "Tarefa atualizada com sucesso!",
-                "tarefa": tarefas[i]
-            }
+    with lock_tarefas:
+        for i, tarefa in enumerate(tarefas):
+            if tarefa.id == tarefa_id:
+                # Atualiza mantendo o ID original
+                tarefas[i] = RegistroTarefa(**tarefa_atualizada.model_dump(), id=tarefa_id)
+                feed.publicar("atualizada", tarefas[i].para_dict())
+
+                return {
+                    "mensagem": "Tarefa atualizada com sucesso!",
+                    "tarefa": tarefas[i].para_dict()
+                }
 
     return {"erro": "Tarefa não encontrada"}
 
@@ -130,17 +235,25 @@ def atualizar_tarefa(tarefa_id: int, tarefa_atualizada: Tarefa):
 @app.delete("/tarefas/{tarefa_id}")
 def deletar_tarefa(tarefa_id: int):
     """Remove uma tarefa pelo ID"""
-    for i, tarefa in enumerate(tarefas):
-        if tarefa["id"] == tarefa_id:
-            tarefa_removida = tarefas.pop(i)
-            return {
-                "mensagem": "Tarefa removida com sucesso!",
-                "tarefa": tarefa_removida
-            }
+    with lock_tarefas:
+        for i, tarefa in enumerate(tarefas):
+            if tarefa.id == tarefa_id:
+                tarefa_removida = tarefas.pop(i)
+                feed.publicar("removida", tarefa_removida.para_dict())
+                return {
+                    "mensagem": "Tarefa removida com sucesso!",
+                    "tarefa": tarefa_removida.para_dict()
+                }
 
     return {"erro": "Tarefa não encontrada"}
 
 
+# ===== DOCUMENTAÇÃO PRÉ-GERADA =====
+# Com OPENAPI_PRECOMPUTADO=1, o /docs usa o openapi.json desta pasta
+# (gerado por scripts/gerar_openapi.py). Fica no final, depois de todas as rotas
+usar_openapi_precomputado(app, Path(__file__).with_name("openapi.json"))
+
+
 # Para rodar: uvicorn main:app --reload
 #
 # Para testar as rotas POST/PUT/DELETE, use a documentação interativa:
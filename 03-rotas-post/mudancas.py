@@ -0,0 +1,117 @@
+# Feed de mudanças das tarefas (Server-Sent Events)
+
+"""
+Em vez de baixar a lista inteira de tarefas a cada poucos segundos, o
+painel pode abrir `GET /tarefas/changes` e receber apenas o que mudou.
+
+Cada mudança recebe um número de sequência crescente e fica guardada em um
+buffer circular de tamanho fixo. O evento é codificado UMA vez, na
+publicação; cada assinante só guarda a posição (cursor) até onde já leu.
+Por isso publicar custa O(1), não importa quantos assinantes existam.
+
+Um assinante lento simplesmente fica para trás. Se ficar tão para trás que
+os eventos já saíram do buffer, recebe um evento `reset` e deve recarregar
+a lista completa - o servidor nunca acumula uma fila por cliente.
+
+Para retomar depois de uma queda, o cliente informa a última sequência
+recebida (header `Last-Event-ID`, enviado automaticamente pelo EventSource
+do navegador, ou o parâmetro `?desde=`).
+"""
+
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Optional
+
+INTERVALO_KEEPALIVE = 15.0  # segundos sem eventos até mandar um comentário
+
+
+class FeedDeMudancas:
+    """Buffer circular de eventos com sequência, compartilhado pelos assinantes"""
+
+    def __init__(self, capacidade: int = 10_000):
+        self.capacidade = capacidade
+        self._buffer: list[Optional[tuple[int, bytes]]] = [None] * capacidade
+        self._sequencia = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._novo_evento = asyncio.Event()
+        self.assinantes = 0
+
+    @property
+    def sequencia(self) -> int:
+        return self._sequencia
+
+    def publicar(self, tipo: str, tarefa: dict):
+        """Registra uma mudança; pode ser chamado de qualquer thread"""
+        with self._lock:
+            seq = self._sequencia + 1
+            dados = json.dumps({"seq": seq, "tipo": tipo, "tarefa": tarefa}, ensure_ascii=False)
+            self._buffer[seq % self.capacidade] = (
+                seq, f"id: {seq}\nevent: {tipo}\ndata: {dados}\n\n".encode()
+            )
+            # Só avança a sequência depois que o evento está no buffer
+            self._sequencia = seq
+
+        # As rotas síncronas rodam em threads; o aviso vai para o event loop
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._acordar_assinantes)
+
+    def _acordar_assinantes(self):
+        """Acorda todos que estão esperando e prepara o próximo aviso"""
+        evento, self._novo_evento = self._novo_evento, asyncio.Event()
+        evento.set()
+
+    def _eventos_apos(self, cursor: int) -> Optional[list[bytes]]:
+        """Eventos com sequência maior que `cursor`, ou None se já saíram do buffer"""
+        fim = self._sequencia
+        if fim - cursor > self.capacidade:
+            return None
+
+        eventos = []
+        for seq in range(cursor + 1, fim + 1):
+            item = self._buffer[seq % self.capacidade]
+            if item is None or item[0] != seq:
+                return None  # Sobrescrito enquanto líamos
+            eventos.append(item[1])
+        return eventos
+
+    async def assinar(self, desde: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Gera os eventos em formato SSE
+
+        - **desde**: última sequência já recebida; sem ela, só eventos novos
+        """
+        self._loop = asyncio.get_running_loop()
+        if desde is None:
+            cursor = self._sequencia
+        elif desde > self._sequencia:
+            cursor = None  # Sequência desconhecida (ex.: servidor reiniciou)
+        else:
+            cursor = desde
+        self.assinantes += 1
+        try:
+            # Diz ao navegador para esperar 3s antes de reconectar
+            yield b"retry: 3000\n\n"
+            while True:
+                # Pega o aviso ANTES de ler o buffer para não perder eventos
+                novo_evento = self._novo_evento
+                eventos = None if cursor is None else self._eventos_apos(cursor)
+
+                if eventos is None:
+                    cursor = self._sequencia
+                    yield (
+                        f"id: {cursor}\nevent: reset\n"
+                        f'data: {{"seq": {cursor}}}\n\n'
+                    ).encode()
+                elif eventos:
+                    cursor += len(eventos)
+                    # Uma única escrita por lote de eventos
+                    yield b"".join(eventos)
+                else:
+                    try:
+                        await asyncio.wait_for(novo_evento.wait(), INTERVALO_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+        finally:
+            self.assinantes -= 1
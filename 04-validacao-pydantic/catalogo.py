@@ -0,0 +1,176 @@
+# Catálogo de produtos em colunas NumPy
+
+"""
+Filtrar uma lista de dicts com um loop Python fica lento quando o catálogo
+tem milhões de produtos. Aqui cada campo usado em filtros vive em um array
+NumPy (uma "coluna"):
+
+- preco, estoque, ativo e data_criacao: arrays numéricos
+- categoria: codificada como dicionário (cada texto vira um número inteiro)
+- nome e descricao: listas Python, lidas apenas na hora de responder
+
+Um filtro vira uma máscara booleana (`preco >= 10`), várias máscaras são
+combinadas com `&`, e a ordenação usa `argsort`. Tudo roda em C, sem loop
+Python por produto. Os dicts só são montados para a página devolvida.
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+import numpy as np
+
+CAMPOS_ORDENACAO = Literal["id", "preco", "estoque", "data_criacao"]
+
+
+def _para_datetime64(valor: datetime) -> np.datetime64:
+    """
+    Converte para UTC: a coluna não guarda fuso, então todas as datas
+    precisam estar no mesmo relógio para serem comparadas
+
+    Datas sem fuso (como o padrão `datetime.now()`) são hora local.
+    """
+    return np.datetime64(valor.astimezone(timezone.utc).replace(tzinfo=None), "us")
+
+
+class CatalogoProdutos:
+    """Produtos armazenados em colunas, com id = posição + 1"""
+
+    def __init__(self, capacidade_inicial: int = 1024):
+        self._lock = threading.Lock()
+        self._tamanho = 0
+        self._preco = np.empty(capacidade_inicial, dtype=np.float64)
+        self._estoque = np.empty(capacidade_inicial, dtype=np.int64)
+        self._ativo = np.empty(capacidade_inicial, dtype=np.bool_)
+        self._data_criacao = np.empty(capacidade_inicial, dtype="datetime64[us]")
+        self._categoria = np.empty(capacidade_inicial, dtype=np.int32)
+        self._nomes: list[str] = []
+        self._descricoes: list[str] = []
+        # Codificação por dicionário: texto <-> código
+        self._categorias: list[str] = []
+        self._codigo_categoria: dict[str, int] = {}
+
+    def __len__(self):
+        return self._tamanho
+
+    def _crescer(self):
+        """Dobra a capacidade das colunas (custo amortizado O(1) por inserção)"""
+        nova = len(self._preco) * 2
+        for nome in ("_preco", "_estoque", "_ativo", "_data_criacao", "_categoria"):
+            antiga = getattr(self, nome)
+            coluna = np.empty(nova, dtype=antiga.dtype)
+            coluna[: self._tamanho] = antiga[: self._tamanho]
+            setattr(self, nome, coluna)
+
+    def adicionar(self, produto: dict) -> int:
+        """Adiciona um produto (dict de `model_dump()`) e devolve o id gerado"""
+        with self._lock:
+            if self._tamanho == len(self._preco):
+                self._crescer()
+
+            categoria = produto["categoria"]
+            codigo = self._codigo_categoria.get(categoria)
+            if codigo is None:
+                codigo = len(self._categorias)
+                self._categorias.append(categoria)
+                self._codigo_categoria[categoria] = codigo
+
+            i = self._tamanho
+            self._preco[i] = produto["preco"]
+            self._estoque[i] = produto["estoque"]
+            self._ativo[i] = produto["ativo"]
+            self._data_criacao[i] = _para_datetime64(produto["data_criacao"])
+            self._categoria[i] = codigo
+            self._nomes.append(produto["nome"])
+            self._descricoes.append(produto["descricao"])
+
+            # Só depois de tudo escrito o produto fica visível para as consultas
+            self._tamanho += 1
+            return i + 1
+
+    def obter(self, produto_id: int) -> Optional[dict]:
+        """Busca direta pela posição - sem percorrer o catálogo"""
+        if not 1 <= produto_id <= self._tamanho:
+            return None
+        return self._materializar(np.array([produto_id - 1]))[0]
+
+    def _materializar(self, indices: np.ndarray) -> list[dict]:
+        """Monta os dicts de resposta apenas para as posições pedidas"""
+        categorias = self._categorias
+        return [
+            {
+                "nome": self._nomes[i],
+                "descricao": self._descricoes[i],
+                "preco": preco,
+                "estoque": estoque,
+                "categoria": categorias[codigo],
+                "ativo": ativo,
+                "data_criacao": data.replace(tzinfo=timezone.utc),
+                "id": i + 1,
+            }
+            for i, preco, estoque, codigo, ativo, data in zip(
+                indices.tolist(),
+                self._preco[indices].tolist(),
+                self._estoque[indices].tolist(),
+                self._categoria[indices].tolist(),
+                self._ativo[indices].tolist(),
+                self._data_criacao[indices].tolist(),
+            )
+        ]
+
+    def consultar(
+        self,
+        apenas_ativos: bool = True,
+        categoria: Optional[str] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        estoque_min: Optional[int] = None,
+        criado_desde: Optional[datetime] = None,
+        criado_ate: Optional[datetime] = None,
+        ordenar_por: CAMPOS_ORDENACAO = "id",
+        decrescente: bool = False,
+        deslocamento: int = 0,
+        limite: Optional[int] = None,
+    ) -> tuple[int, list[dict]]:
+        """
+        Filtra e ordena o catálogo
+
+        Retorna o total de produtos encontrados e a página pedida
+        (`deslocamento` / `limite`) já convertida em dicts.
+        """
+        n = self._tamanho
+        preco = self._preco[:n]
+        estoque = self._estoque[:n]
+        data_criacao = self._data_criacao[:n]
+
+        # Cada filtro é uma máscara booleana; todas são combinadas com "e"
+        mascara = np.ones(n, dtype=np.bool_)
+        if apenas_ativos:
+            mascara &= self._ativo[:n]
+        if categoria is not None:
+            codigo = self._codigo_categoria.get(categoria)
+            if codigo is None:
+                return 0, []
+            mascara &= self._categoria[:n] == codigo
+        if preco_min is not None:
+            mascara &= preco >= preco_min
+        if preco_max is not None:
+            mascara &= preco <= preco_max
+        if estoque_min is not None:
+            mascara &= estoque >= estoque_min
+        if criado_desde is not None:
+            mascara &= data_criacao >= _para_datetime64(criado_desde)
+        if criado_ate is not None:
+            mascara &= data_criacao <= _para_datetime64(criado_ate)
+
+        indices = np.flatnonzero(mascara)
+
+        if ordenar_por != "id":
+            coluna = {"preco": preco, "estoque": estoque, "data_criacao": data_criacao}[ordenar_por]
+            # "stable" mantém a ordem de id entre valores empatados
+            indices = indices[np.argsort(coluna[indices], kind="stable")]
+        if decrescente:
+            indices = indices[::-1]
+
+        fim = None if limite is None else deslocamento + limite
+        return len(indices), self._materializar(indices[deslocamento:fim])
@@ -1,8 +1,24 @@
 # Etapa 04: Validação Avançada com Pydantic
+import sys
+from pathlib import Path
+
+# Os módulos de compartilhado/ (na raiz do projeto) são usados por várias etapas
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from datetime import datetime
 from http import HTTPStatus
+from typing import Literal, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from pydantic_core import to_jsonable_python
+from catalogo import CAMPOS_ORDENACAO, CatalogoProdutos
+from models import Usuario, Produto, IdsLote, RespostaPadrao
 
-from fastapi import FastAPI, HTTPException
-from models import Usuario, Produto, RespostaPadrao
+from compartilhado.coalescencia import GrupoCoalescencia
+from compartilhado.idempotencia import CacheIdempotencia
+from compartilhado.limites import configurar_limites
+from compartilhado.memoria import configurar_rastreamento, router_admin
+from compartilhado.openapi_cache import usar_openapi_precomputado
 
 app = FastAPI(
     title="API com Validações Avançadas",
@@ -10,9 +26,26 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Um cliente em loop recebe 429 antes de ocupar todos os workers
+# POST /produtos/batch só consulta: conta como leitura
+limitador = configurar_limites(app, rotas_leitura=frozenset({("POST", "/produtos/batch")}))
+
+# Opcional (RASTREAR_MEMORIA=1): quais rotas alocam mais memória
+configurar_rastreamento(app)
+
 # "Banco de dados" em memória
 usuarios = []
-produtos = []
+produtos = CatalogoProdutos()  # Colunas NumPy, ver catalogo.py
+
+# Versões incrementadas a cada escrita: listagens antigas não são reaproveitadas
+usuarios_versao = 0
+produtos_versao = 0
+
+# GET /produtos e /usuarios iguais e simultâneos montam a resposta uma vez só
+coalescencia = GrupoCoalescencia()
+
+# POST /produtos repetido com o mesmo Idempotency-Key devolve o mesmo produto
+idempotencia = CacheIdempotencia()
 
 
 # ===== ROTAS DE USUÁRIOS =====
@@ -44,6 +77,8 @@ def criar_usuario(usuario: Usuario):
     - Site: deve começar com http:// ou https://
     - Bio: máximo 500 caracteres, sem palavras proibidas
     """
+    global usuarios_versao
+
     # Verifica se email já existe
     for u in usuarios:
         if u["email"] == usuario.email:
@@ -54,6 +89,7 @@ def criar_usuario(usuario: Usuario):
 
     usuario_dict = usuario.model_dump()
     usuarios.append(usuario_dict)
+    usuarios_versao += 1
 
     return RespostaPadrao(
         sucesso=True,
@@ -63,18 +99,34 @@ def criar_usuario(usuario: Usuario):
 
 
 @app.get("/usuarios")
-def listar_usuarios():
+def listar_usuarios(request: Request):
     """Lista todos os usuários"""
-    return {
-        "total": len(usuarios),
-        "usuarios": usuarios
-    }
+    chave = (request.url.path, request.url.query, usuarios_versao)
+    corpo = coalescencia.executar(
+        chave, lambda: {"total": len(usuarios), "usuarios": usuarios}
+    )
+    return Response(content=corpo, media_type="application/json")
 
 
 # ===== ROTAS DE PRODUTOS =====
 
+def em_json(dados):
+    """
+    Converte com o serializador do Pydantic, o mesmo do POST (RespostaPadrao)
+
+    Sem isso as rotas GET passariam pelo jsonable_encoder, que escreve a
+    mesma data como `+00:00` em vez de `Z`.
+    """
+    return to_jsonable_python(dados)
+
+
 @app.post("/produtos", response_model=RespostaPadrao)
-def criar_produto(produto: Produto):
+def criar_produto(
+    produto: Produto,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Cria um novo produto com validações:
     - Nome: 3-100 caracteres, com pelo menos uma letra/número
@@ -82,45 +134,143 @@ def criar_produto(produto: Produto):
     - Preço: maior que 0, máximo 1 milhão
     - Estoque: não pode ser negativo
     - Data de criação: gerada automaticamente
+
+    Com o header **Idempotency-Key**, repetir a requisição com a mesma
+    chave devolve a resposta original em vez de criar outro produto.
     """
-    produto_dict = produto.model_dump()
+    def criar():
+        global produtos_versao
 
-    # Gera ID sequencial
-    produto_dict["id"] = len(produtos) + 1
+        # O catálogo gera o ID sequencial
+        produto_id = produtos.adicionar(produto.model_dump())
+        produtos_versao += 1
 
-    produtos.append(produto_dict)
+        return RespostaPadrao(
+            sucesso=True,
+            mensagem="Produto criado com sucesso!",
+            dados=produtos.obter(produto_id)
+        )
 
-    return RespostaPadrao(
-        sucesso=True,
-        mensagem="Produto criado com sucesso!",
-        dados=produto_dict
-    )
+    return idempotencia.responder("produtos", request, idempotency_key, produto, response, criar)
 
 
 @app.get("/produtos")
-def listar_produtos(apenas_ativos: bool = True):
+def listar_produtos(
+    request: Request,
+    apenas_ativos: bool = True,
+    categoria: Optional[str] = None,
+    preco_min: Optional[float] = Query(None, ge=0),
+    preco_max: Optional[float] = Query(None, ge=0),
+    estoque_min: Optional[int] = Query(None, ge=0),
+    criado_desde: Optional[datetime] = None,
+    criado_ate: Optional[datetime] = None,
+    ordenar_por: CAMPOS_ORDENACAO = "id",
+    ordem: Literal["asc", "desc"] = "asc",
+    deslocamento: int = Query(0, ge=0),
+    limite: Optional[int] = Query(None, ge=1),
+):
     """
-    Lista produtos
+    Lista produtos com filtros e ordenação
 
     - **apenas_ativos**: se True, retorna apenas produtos ativos
+    - **categoria**: apenas produtos desta categoria
+    - **preco_min** / **preco_max**: faixa de preço
+    - **estoque_min**: estoque mínimo
+    - **criado_desde** / **criado_ate**: faixa de data de criação
+    - **ordenar_por**: id, preco, estoque ou data_criacao
+    - **ordem**: asc ou desc
+    - **deslocamento** / **limite**: paginação
+
+    Exemplo: /produtos?categoria=Livros&preco_max=100&ordenar_por=preco
+
+    `total` é a quantidade de produtos que passaram pelos filtros,
+    antes da paginação.
     """
-    if apenas_ativos:
-        produtos_filtrados = [p for p in produtos if p.get("ativo", True)]
-    else:
-        produtos_filtrados = produtos
+    def calcular():
+        total, produtos_filtrados = produtos.consultar(
+            apenas_ativos=apenas_ativos,
+            categoria=categoria,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            estoque_min=estoque_min,
+            criado_desde=criado_desde,
+            criado_ate=criado_ate,
+            ordenar_por=ordenar_por,
+            decrescente=ordem == "desc",
+            deslocamento=deslocamento,
+            limite=limite,
+        )
+
+        return em_json({
+            "total": total,
+            "produtos": produtos_filtrados
+        })
+
+    chave = (request.url.path, request.url.query, produtos_versao)
+    corpo = coalescencia.executar(chave, calcular)
+    return Response(content=corpo, media_type="application/json")
+
+
+def ler_ids(texto: str) -> list[int]:
+    """Converte "1,2,3" em [1, 2, 3]"""
+    try:
+        return [int(parte) for parte in texto.split(",") if parte.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail="ids deve ser uma lista de números separados por vírgula"
+        )
 
-    return {
-        "total": len(produtos_filtrados),
-        "produtos": produtos_filtrados
-    }
+
+def buscar_produtos(ids: list[int]) -> dict:
+    """Busca vários produtos pelo ID, na ordem pedida (IDs repetidos contam uma vez)"""
+    encontrados = []
+    nao_encontrados = []
+    for produto_id in dict.fromkeys(ids):
+        produto = produtos.obter(produto_id)
+        if produto is None:
+            nao_encontrados.append(produto_id)
+        else:
+            encontrados.append(produto)
+
+    return em_json({
+        "total": len(encontrados),
+        "produtos": encontrados,
+        "nao_encontrados": nao_encontrados
+    })
+
+
+# As rotas /batch precisam vir antes de /produtos/{produto_id}
+@app.get("/produtos/batch")
+def obter_varios_produtos(ids: str = Query(..., examples=["1,2,3"])):
+    """
+    Obtém vários produtos de uma vez
+
+    - **ids**: IDs separados por vírgula (ex.: /produtos/batch?ids=1,2,3)
+
+    Para listas longas, use `POST /produtos/batch`.
+    """
+    ids_lidos = ler_ids(ids)
+    if len(ids_lidos) > 1000:
+        raise HTTPException(
+            status_code=422,
+            detail="Máximo de 1000 IDs na URL; use POST /produtos/batch"
+        )
+    return buscar_produtos(ids_lidos)
+
+
+@app.post("/produtos/batch")
+def obter_varios_produtos_post(corpo: IdsLote):
+    """Obtém vários produtos de uma vez, com os IDs no corpo da requisição"""
+    return buscar_produtos(corpo.ids)
 
 
 @app.get("/produtos/{produto_id}")
 def obter_produto(produto_id: int):
     """Obtém um produto específico"""
-    for produto in produtos:
-        if produto["id"] == produto_id:
-            return produto
+    produto = produtos.obter(produto_id)
+    if produto is not None:
+        return em_json(produto)
 
     raise HTTPException(
         status_code=404,
@@ -128,6 +278,24 @@ def obter_produto(produto_id: int):
     )
 
 
+# ===== MÉTRICAS =====
+
+@app.get("/metricas/coalescencia")
+def metricas_coalescencia():
+    """Quantas listagens foram calculadas e quantas reaproveitaram o resultado"""
+    return coalescencia.metricas()
+
+
+# GET /admin/memoria e POST /admin/memoria/snapshot
+app.include_router(router_admin)
+
+
+# ===== DOCUMENTAÇÃO PRÉ-GERADA =====
+# OPENAPI_PRECOMPUTADO=1 serve o openapi.json desta pasta no lugar do schema
+# montado na hora; por isso é chamado só depois de registrar todas as rotas
+usar_openapi_precomputado(app, Path(__file__).with_name("openapi.json"))
+
+
 # Para rodar: uvicorn main:app --reload
 #
 # Teste as validações em http://localhost:8000/docs
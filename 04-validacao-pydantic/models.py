@@ -3,6 +3,10 @@
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field, EmailStr, field_validator
+from moderacao import ListaDePalavrasProibidas
+
+# Compilada uma única vez; configurável por variáveis de ambiente (ver moderacao.py)
+palavras_proibidas = ListaDePalavrasProibidas.do_ambiente()
 
 
 class Usuario(BaseModel):
@@ -57,12 +61,9 @@ class Usuario(BaseModel):
         if valor is None:
             return valor
 
-        palavras_proibidas = ['spam', 'anúncio']
-        valor_lower = valor.lower()
-
-        for palavra in palavras_proibidas:
-            if palavra in valor_lower:
-                raise ValueError(f'A bio não pode conter a palavra "{palavra}"')
+        palavra = palavras_proibidas.encontrar(valor)
+        if palavra is not None:
+            raise ValueError(f'A bio não pode conter a palavra "{palavra}"')
 
         return valor
 
@@ -159,6 +160,17 @@ class Produto(BaseModel):
     }
 
 
+class IdsLote(BaseModel):
+    """Lista de IDs para buscar vários registros de uma vez"""
+    ids: list[int] = Field(..., min_length=1, max_length=10_000)
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{"ids": [1, 2, 3]}]
+        }
+    }
+
+
 class RespostaPadrao(BaseModel):
     """Modelo padrão de resposta da API"""
     sucesso: bool
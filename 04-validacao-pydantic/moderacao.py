@@ -0,0 +1,197 @@
+# Moderação: busca de palavras proibidas
+
+"""
+Verificar `palavra in texto` para cada palavra proibida fica lento quando a
+lista tem milhares de termos: o texto é percorrido uma vez POR PALAVRA.
+
+Aqui as palavras são compiladas uma única vez em um autômato Aho-Corasick,
+que encontra qualquer uma delas percorrendo o texto UMA vez só, não importa
+o tamanho da lista.
+
+- Acentos e maiúsculas são ignorados: "Anúncio" encontra "anuncio"
+- `palavra_inteira=True` só aceita ocorrências que não fazem parte de outra
+  palavra ("spam" não bloqueia "spammer")
+- A lista pode vir de um arquivo (uma palavra por linha, `#` para
+  comentários) e é recarregada automaticamente quando o arquivo muda
+
+Configuração por variáveis de ambiente:
+- PALAVRAS_PROIBIDAS_ARQUIVO: caminho do arquivo com a lista
+- PALAVRAS_PROIBIDAS_PALAVRA_INTEIRA: "1" para exigir palavra inteira
+"""
+
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Iterable, Optional
+
+PALAVRAS_PADRAO = ["spam", "anúncio"]
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos e ignora maiúsculas/minúsculas"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+class AhoCorasick:
+    """Autômato que encontra vários termos em uma única passada pelo texto"""
+
+    def __init__(self, termos: Iterable[str]):
+        # Cada nó da árvore de prefixos é um índice nestas listas
+        self._transicoes: list[dict[str, int]] = [{}]
+        self._falha: list[int] = [0]      # Maior sufixo que também é prefixo
+        self._termo: list[int] = [-1]     # Termo que termina neste nó (-1: nenhum)
+        self._proxima_saida: list[int] = [0]  # Próximo nó com termo na cadeia de falha
+        self.termos: list[tuple[str, int]] = []  # (termo original, tamanho normalizado)
+
+        for termo in termos:
+            self._inserir(termo)
+        self._construir_falhas()
+
+    def __len__(self):
+        return len(self.termos)
+
+    def _inserir(self, termo: str):
+        chave = normalizar(termo.strip())
+        if not chave:
+            return
+
+        no = 0
+        for caractere in chave:
+            proximo = self._transicoes[no].get(caractere)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes.append({})
+                self._falha.append(0)
+                self._termo.append(-1)
+                self._proxima_saida.append(0)
+                self._transicoes[no][caractere] = proximo
+            no = proximo
+
+        if self._termo[no] == -1:
+            self._termo[no] = len(self.termos)
+            self.termos.append((termo.strip(), len(chave)))
+
+    def _construir_falhas(self):
+        """Busca em largura: os links de falha de um nível dependem do anterior"""
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            no = fila.popleft()
+            for caractere, filho in self._transicoes[no].items():
+                fila.append(filho)
+
+                falha = self._falha[no]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                if destino == filho:
+                    destino = 0  # Filhos da raiz falham para a raiz
+
+                self._falha[filho] = destino
+                self._proxima_saida[filho] = (
+                    destino if self._termo[destino] != -1 else self._proxima_saida[destino]
+                )
+
+    def encontrar(self, texto: str, palavra_inteira: bool = False) -> Optional[str]:
+        """Retorna o primeiro termo encontrado no texto, ou None"""
+        texto = normalizar(texto)
+        transicoes, falha = self._transicoes, self._falha
+        no = 0
+
+        for fim, caractere in enumerate(texto):
+            while no and caractere not in transicoes[no]:
+                no = falha[no]
+            no = transicoes[no].get(caractere, 0)
+
+            saida = no if self._termo[no] != -1 else self._proxima_saida[no]
+            while saida:
+                termo, tamanho = self.termos[self._termo[saida]]
+                if not palavra_inteira or _palavra_isolada(texto, fim - tamanho + 1, fim):
+                    return termo
+                saida = self._proxima_saida[saida]
+
+        return None
+
+
+def _palavra_isolada(texto: str, inicio: int, fim: int) -> bool:
+    """Verifica se texto[inicio:fim + 1] não está grudado em letras ou números"""
+    antes = inicio == 0 or not texto[inicio - 1].isalnum()
+    depois = fim + 1 == len(texto) or not texto[fim + 1].isalnum()
+    return antes and depois
+
+
+def ler_arquivo(caminho: str) -> list[str]:
+    """Uma palavra por linha; linhas vazias e comentários (#) são ignorados"""
+    with open(caminho, encoding="utf-8") as arquivo:
+        linhas = (linha.strip() for linha in arquivo)
+        return [linha for linha in linhas if linha and not linha.startswith("#")]
+
+
+class ListaDePalavrasProibidas:
+    """
+    Lista de palavras proibidas, opcionalmente lida de um arquivo
+
+    Quando há arquivo, a data de modificação é conferida no máximo a cada
+    `intervalo_verificacao` segundos; se mudou, o autômato é recompilado
+    sem precisar reiniciar o servidor.
+    """
+
+    def __init__(
+        self,
+        palavras: Iterable[str] = PALAVRAS_PADRAO,
+        arquivo: Optional[str] = None,
+        palavra_inteira: bool = False,
+        intervalo_verificacao: float = 1.0,
+    ):
+        self.arquivo = arquivo
+        self.palavra_inteira = palavra_inteira
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._modificado_em: Optional[float] = None
+        self._verificado_em = 0.0
+        self._automato = AhoCorasick(palavras)
+        if arquivo:
+            self.recarregar()
+
+    @classmethod
+    def do_ambiente(cls) -> "ListaDePalavrasProibidas":
+        """Cria a lista a partir das variáveis de ambiente"""
+        return cls(
+            arquivo=os.environ.get("PALAVRAS_PROIBIDAS_ARQUIVO") or None,
+            palavra_inteira=os.environ.get("PALAVRAS_PROIBIDAS_PALAVRA_INTEIRA") == "1",
+        )
+
+    def recarregar(self):
+        """Lê o arquivo e recompila o autômato se ele mudou"""
+        modificado_em = os.stat(self.arquivo).st_mtime
+        if modificado_em == self._modificado_em:
+            return
+        automato = AhoCorasick(ler_arquivo(self.arquivo))
+        # Troca de referência: quem está validando agora termina com o antigo
+        self._automato, self._modificado_em = automato, modificado_em
+
+    def _verificar_arquivo(self):
+        agora = time.monotonic()
+        if agora - self._verificado_em < self.intervalo_verificacao:
+            return
+        # Só uma thread confere o arquivo; as outras seguem com a lista atual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._verificado_em = agora
+            self.recarregar()
+        except OSError:
+            pass  # Arquivo sumiu ou está sendo escrito: mantém a lista anterior
+        finally:
+            self._lock.release()
+
+    def encontrar(self, texto: str) -> Optional[str]:
+        """Retorna a primeira palavra proibida presente no texto, ou None"""
+        if self.arquivo:
+            self._verificar_arquivo()
+        return self._automato.encontrar(texto, self.palavra_inteira)
+
+    def __len__(self):
+        return len(self._automato)
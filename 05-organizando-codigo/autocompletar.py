@@ -0,0 +1,81 @@
+# Índice de prefixos para autocompletar
+
+"""
+Para sugerir títulos e nomes enquanto o usuário digita, não dá para
+percorrer todos os registros a cada tecla.
+
+O `IndicePrefixos` mantém uma lista ORDENADA de (texto normalizado, id).
+Em uma lista ordenada, todos os textos que começam com um prefixo ficam
+lado a lado: `bisect` acha o primeiro em O(log n) e basta ler os próximos
+`limite` itens. O índice é atualizado a cada criação, alteração e remoção.
+
+A normalização ignora acentos e maiúsculas: "pyt" encontra "Python" e
+"joao" encontra "João".
+"""
+
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Iterable
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos, espaços extras e ignora maiúsculas/minúsculas"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+class IndicePrefixos:
+    """Lista ordenada de textos normalizados para busca por prefixo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: list[tuple[str, int]] = []
+        self._textos: dict[int, str] = {}  # id -> texto original
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def adicionar(self, registro_id: int, texto: str):
+        with self._lock:
+            self._remover(registro_id)
+            self._textos[registro_id] = texto
+            insort(self._entradas, (normalizar(texto), registro_id))
+
+    def carregar(self, registros: Iterable[tuple[int, str]]):
+        """Carga inicial em massa: uma única ordenação em vez de n inserções"""
+        novos = dict(registros)
+        with self._lock:
+            # Remove as versões antigas enquanto a lista ainda está ordenada
+            for registro_id in novos:
+                self._remover(registro_id)
+            for registro_id, texto in novos.items():
+                self._textos[registro_id] = texto
+                self._entradas.append((normalizar(texto), registro_id))
+            self._entradas.sort()
+
+    def remover(self, registro_id: int):
+        with self._lock:
+            self._remover(registro_id)
+
+    def _remover(self, registro_id: int):
+        texto = self._textos.pop(registro_id, None)
+        if texto is None:
+            return
+        entrada = (normalizar(texto), registro_id)
+        posicao = bisect_left(self._entradas, entrada)
+        if posicao < len(self._entradas) and self._entradas[posicao] == entrada:
+            del self._entradas[posicao]
+
+    def buscar(self, prefixo: str, limite: int = 10) -> list[tuple[int, str]]:
+        """Até `limite` pares (id, texto) que começam com `prefixo`, em ordem alfabética"""
+        prefixo = normalizar(prefixo)
+        resultados = []
+        with self._lock:
+            posicao = bisect_left(self._entradas, (prefixo,))
+            for chave, registro_id in self._entradas[posicao:posicao + limite]:
+                if not chave.startswith(prefixo):
+                    break
+                resultados.append((registro_id, self._textos[registro_id]))
+        return resultados
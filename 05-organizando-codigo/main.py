@@ -7,10 +7,21 @@ Estrutura:
 - main.py: Arquivo principal, configura a aplicação
 - models.py: Modelos Pydantic (validação de dados)
 - routers.py: Rotas organizadas por recurso
+- ../compartilhado/: limite de taxa, idempotência e outros módulos comuns
 """
 
+import sys
+from pathlib import Path
+
+# Os módulos de compartilhado/ (na raiz do projeto) são usados por várias etapas
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from fastapi import FastAPI
-from routers import router_livros, router_autores
+from routers import router_livros, router_autores, coalescencia
+
+from compartilhado.limites import configurar_limites
+from compartilhado.memoria import configurar_rastreamento, router_admin
+from compartilhado.openapi_cache import usar_openapi_precomputado
 
 # Criando a aplicação principal
 app = FastAPI(
@@ -23,6 +34,12 @@ app = FastAPI(
     }
 )
 
+# Middlewares ficam aqui, no app; os routers não sabem deles
+# POST /livros/batch só consulta: conta como leitura
+limitador = configurar_limites(app, rotas_leitura=frozenset({("POST", "/livros/batch")}))
+
+configurar_rastreamento(app)
+
 
 # ===== ROTA RAIZ =====
 # Esta fica no arquivo principal pois é única
@@ -41,11 +58,23 @@ def raiz():
     }
 
 
+@app.get("/metricas/coalescencia", tags=["raiz"])
+def metricas_coalescencia():
+    """Quantas listagens foram calculadas e quantas reaproveitaram o resultado"""
+    return coalescencia.metricas()
+
+
 # ===== INCLUINDO OS ROUTERS =====
 # Aqui "montamos" as rotas organizadas nos routers
 
 app.include_router(router_livros)
 app.include_router(router_autores)
+app.include_router(router_admin)
+
+
+# ===== DOCUMENTAÇÃO PRÉ-GERADA =====
+# Depois dos routers: o openapi.json guardado precisa descrever todos eles
+usar_openapi_precomputado(app, Path(__file__).with_name("openapi.json"))
 
 
 # ===== COMO FUNCIONA =====
@@ -0,0 +1,42 @@
+# Registros compactos guardados no "banco de dados" em memória
+
+"""
+Os modelos Pydantic validam o que chega na API, mas guardar cada registro
+como o dict de `model_dump()` custa caro: todo dict repete as chaves e
+reserva espaço extra para crescer.
+
+Aqui usamos dataclasses com `__slots__` (sem `__dict__` por instância) e
+`sys.intern` nos textos que se repetem muito, como o nome do autor.
+O dict só é montado na hora de responder, com `para_dict()`.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class RegistroLivro:
+    """Livro armazenado em memória"""
+    titulo: str
+    autor: str
+    ano: int
+    isbn: Optional[str]
+    paginas: int
+    disponivel: bool
+    id: int
+
+    def __post_init__(self):
+        # Autores se repetem entre livros: guardamos uma única cópia do texto
+        self.autor = sys.intern(self.autor)
+
+    def para_dict(self) -> dict:
+        return {
+            "titulo": self.titulo,
+            "autor": self.autor,
+            "ano": self.ano,
+            "isbn": self.isbn,
+            "paginas": self.paginas,
+            "disponivel": self.disponivel,
+            "id": self.id,
+        }
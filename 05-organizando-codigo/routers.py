@@ -1,7 +1,19 @@
 # Rotas organizadas por recurso
 
-from fastapi import APIRouter, HTTPException
-from models import Livro, Autor, RespostaPadrao
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from autocompletar import IndicePrefixos
+from models import Livro, Autor, IdsLote, RespostaPadrao
+from registros import RegistroLivro
+
+# compartilhado/ entra no sys.path pelo main.py
+from compartilhado.coalescencia import GrupoCoalescencia
+from compartilhado.idempotencia import CacheIdempotencia
+
+coalescencia = GrupoCoalescencia()  # usado por GET /livros/ e GET /autores/
+idempotencia = CacheIdempotencia()  # usado por POST /livros/
 
 # ===== ROUTER DE LIVROS =====
 # APIRouter permite agrupar rotas relacionadas
@@ -12,66 +24,174 @@ router_livros = APIRouter(
     tags=["livros"]    # Agrupa na documentação
 )
 
-# "Banco de dados" em memória
-livros_db = []
+# "Banco de dados" em memória, indexado pelo ID: buscas diretas, sem percorrer a lista
+# (o dict mantém a ordem de inserção, então as listagens continuam em ordem)
+livros_db: dict[int, RegistroLivro] = {}  # Registros compactos, ver registros.py
 livros_id_counter = 1
+livros_versao = 0  # Incrementada a cada escrita, invalida as listagens
+titulos_indice = IndicePrefixos()  # Autocompletar de títulos
+
+# As rotas síncronas rodam em threads, e um dict que muda de tamanho durante
+# a iteração dá erro: escritas e cópias para listagem passam por este lock
+lock_livros = threading.Lock()
 
 
 @router_livros.get("/")
-def listar_livros(disponivel: bool | None = None):
+def listar_livros(request: Request, disponivel: bool | None = None):
     """
     Lista todos os livros
 
     - **disponivel**: Filtra por disponibilidade (opcional)
     """
-    if disponivel is None:
-        return {"total": len(livros_db), "livros": livros_db}
+    def calcular():
+        with lock_livros:
+            livros = list(livros_db.values())
+
+        if disponivel is None:
+            livros_filtrados = livros
+        else:
+            livros_filtrados = [l for l in livros if l.disponivel == disponivel]
+
+        return {
+            "total": len(livros_filtrados),
+            "livros": [l.para_dict() for l in livros_filtrados]
+        }
+
+    chave = (request.url.path, request.url.query, livros_versao)
+    corpo = coalescencia.executar(chave, calcular)
+    return Response(content=corpo, media_type="application/json")
+
+
+def ler_ids(texto: str) -> list[int]:
+    """Converte "1,2,3" em [1, 2, 3]"""
+    try:
+        return [int(parte) for parte in texto.split(",") if parte.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail="ids deve ser uma lista de números separados por vírgula"
+        )
+
+
+def buscar_livros(ids: list[int]) -> dict:
+    """Busca vários livros pelo ID, na ordem pedida (IDs repetidos contam uma vez)"""
+    encontrados = []
+    nao_encontrados = []
+    for livro_id in dict.fromkeys(ids):
+        livro = livros_db.get(livro_id)
+        if livro is None:
+            nao_encontrados.append(livro_id)
+        else:
+            encontrados.append(livro.para_dict())
+
+    return {
+        "total": len(encontrados),
+        "livros": encontrados,
+        "nao_encontrados": nao_encontrados
+    }
+
+
+# As rotas /autocomplete e /batch precisam vir antes de /{livro_id}
+@router_livros.get("/autocomplete")
+def autocompletar_livros(
+    q: str = Query(..., min_length=1, examples=["pyt"]),
+    limite: int = Query(10, ge=1, le=100),
+):
+    """
+    Sugere títulos de livros que começam com o texto digitado
+
+    - **q**: início do título (acentos e maiúsculas são ignorados)
+    - **limite**: quantidade máxima de sugestões
+    """
+    sugestoes = [
+        {"id": livro_id, "titulo": titulo}
+        for livro_id, titulo in titulos_indice.buscar(q, limite)
+    ]
+    return {"q": q, "sugestoes": sugestoes}
 
-    livros_filtrados = [l for l in livros_db if l["disponivel"] == disponivel]
-    return {"total": len(livros_filtrados), "livros": livros_filtrados}
+
+@router_livros.get("/batch")
+def obter_varios_livros(ids: str = Query(..., examples=["1,2,3"])):
+    """
+    Obtém vários livros de uma vez
+
+    - **ids**: IDs separados por vírgula (ex.: /livros/batch?ids=1,2,3)
+
+    Para listas longas, use `POST /livros/batch`.
+    """
+    ids_lidos = ler_ids(ids)
+    if len(ids_lidos) > 1000:
+        raise HTTPException(
+            status_code=422,
+            detail="Máximo de 1000 IDs na URL; use POST /livros/batch"
+        )
+    return buscar_livros(ids_lidos)
+
+
+@router_livros.post("/batch")
+def obter_varios_livros_post(corpo: IdsLote):
+    """Obtém vários livros de uma vez, com os IDs no corpo da requisição"""
+    return buscar_livros(corpo.ids)
 
 
 @router_livros.get("/{livro_id}")
 def obter_livro(livro_id: int):
     """Obtém um livro específico pelo ID"""
-    for livro in livros_db:
-        if livro["id"] == livro_id:
-            return livro
+    livro = livros_db.get(livro_id)
+    if livro is not None:
+        return livro.para_dict()
 
     raise HTTPException(status_code=404, detail="Livro não encontrado")
 
 
 @router_livros.post("/", response_model=RespostaPadrao)
-def criar_livro(livro: Livro):
-    """Cria um novo livro"""
-    global livros_id_counter
+def criar_livro(
+    livro: Livro,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """
+    Cria um novo livro
 
-    livro_dict = livro.model_dump()
-    livro_dict["id"] = livros_id_counter
-    livros_id_counter += 1
+    - **Idempotency-Key** (header, opcional): repetir a requisição com a
+      mesma chave devolve a resposta original em vez de criar outro livro
+    """
+    def criar():
+        global livros_id_counter, livros_versao
 
-    livros_db.append(livro_dict)
+        with lock_livros:
+            registro = RegistroLivro(**livro.model_dump(), id=livros_id_counter)
+            livros_id_counter += 1
 
-    return RespostaPadrao(
-        sucesso=True,
-        mensagem="Livro criado com sucesso!",
-        dados=livro_dict
-    )
+            livros_db[registro.id] = registro
+            titulos_indice.adicionar(registro.id, registro.titulo)
+            livros_versao += 1
+
+        return RespostaPadrao(
+            sucesso=True,
+            mensagem="Livro criado com sucesso!",
+            dados=registro.para_dict()
+        )
+
+    return idempotencia.responder("livros", request, idempotency_key, livro, response, criar)
 
 
 @router_livros.put("/{livro_id}", response_model=RespostaPadrao)
 def atualizar_livro(livro_id: int, livro: Livro):
     """Atualiza um livro existente"""
-    for i, l in enumerate(livros_db):
-        if l["id"] == livro_id:
-            livro_dict = livro.model_dump()
-            livro_dict["id"] = livro_id
-            livros_db[i] = livro_dict
+    global livros_versao
+
+    with lock_livros:
+        if livro_id in livros_db:
+            livros_db[livro_id] = RegistroLivro(**livro.model_dump(), id=livro_id)
+            titulos_indice.adicionar(livro_id, livro.titulo)
+            livros_versao += 1
 
             return RespostaPadrao(
                 sucesso=True,
                 mensagem="Livro atualizado com sucesso!",
-                dados=livro_dict
+                dados=livros_db[livro_id].para_dict()
             )
 
     raise HTTPException(status_code=404, detail="Livro não encontrado")
@@ -80,13 +200,17 @@ def atualizar_livro(livro_id: int, livro: Livro):
 @router_livros.delete("/{livro_id}", response_model=RespostaPadrao)
 def deletar_livro(livro_id: int):
     """Remove um livro"""
-    for i, l in enumerate(livros_db):
-        if l["id"] == livro_id:
-            livro_removido = livros_db.pop(i)
+    global livros_versao
+
+    with lock_livros:
+        livro_removido = livros_db.pop(livro_id, None)
+        if livro_removido is not None:
+            titulos_indice.remover(livro_id)
+            livros_versao += 1
             return RespostaPadrao(
                 sucesso=True,
                 mensagem="Livro removido com sucesso!",
-                dados=livro_removido
+                dados=livro_removido.para_dict()
             )
 
     raise HTTPException(status_code=404, detail="Livro não encontrado")
@@ -102,12 +226,37 @@ router_autores = APIRouter(
 # "Banco de dados" em memória
 autores_db = []
 autores_id_counter = 1
+autores_versao = 0
+nomes_indice = IndicePrefixos()  # Autocompletar de nomes
 
 
 @router_autores.get("/")
-def listar_autores():
+def listar_autores(request: Request):
     """Lista todos os autores"""
-    return {"total": len(autores_db), "autores": autores_db}
+    chave = (request.url.path, request.url.query, autores_versao)
+    corpo = coalescencia.executar(
+        chave, lambda: {"total": len(autores_db), "autores": autores_db}
+    )
+    return Response(content=corpo, media_type="application/json")
+
+
+# Precisa vir antes de /{autor_id}
+@router_autores.get("/autocomplete")
+def autocompletar_autores(
+    q: str = Query(..., min_length=1, examples=["luc"]),
+    limite: int = Query(10, ge=1, le=100),
+):
+    """
+    Sugere nomes de autores que começam com o texto digitado
+
+    - **q**: início do nome (acentos e maiúsculas são ignorados)
+    - **limite**: quantidade máxima de sugestões
+    """
+    sugestoes = [
+        {"id": autor_id, "nome": nome}
+        for autor_id, nome in nomes_indice.buscar(q, limite)
+    ]
+    return {"q": q, "sugestoes": sugestoes}
 
 
 @router_autores.get("/{autor_id}")
@@ -123,7 +272,7 @@ def obter_autor(autor_id: int):
 @router_autores.post("/", response_model=RespostaPadrao)
 def criar_autor(autor: Autor):
     """Cria um novo autor"""
-    global autores_id_counter
+    global autores_id_counter, autores_versao
 
     # Verifica se email já existe
     for a in autores_db:
@@ -138,6 +287,8 @@ def criar_autor(autor: Autor):
     autores_id_counter += 1
 
     autores_db.append(autor_dict)
+    nomes_indice.adicionar(autor_dict["id"], autor_dict["nome"])
+    autores_versao += 1
 
     return RespostaPadrao(
         sucesso=True,
@@ -149,11 +300,15 @@ def criar_autor(autor: Autor):
 @router_autores.put("/{autor_id}", response_model=RespostaPadrao)
 def atualizar_autor(autor_id: int, autor: Autor):
     """Atualiza um autor existente"""
+    global autores_versao
+
     for i, a in enumerate(autores_db):
         if a["id"] == autor_id:
             autor_dict = autor.model_dump()
             autor_dict["id"] = autor_id
             autores_db[i] = autor_dict
+            nomes_indice.adicionar(autor_id, autor_dict["nome"])
+            autores_versao += 1
 
             return RespostaPadrao(
                 sucesso=True,
@@ -167,9 +322,13 @@ def atualizar_autor(autor_id: int, autor: Autor):
 @router_autores.delete("/{autor_id}", response_model=RespostaPadrao)
 def deletar_autor(autor_id: int):
     """Remove um autor"""
+    global autores_versao
+
     for i, a in enumerate(autores_db):
         if a["id"] == autor_id:
             autor_removido = autores_db.pop(i)
+            nomes_indice.remover(autor_id)
+            autores_versao += 1
             return RespostaPadrao(
                 sucesso=True,
                 mensagem="Autor removido com sucesso!",
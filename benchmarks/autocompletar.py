@@ -0,0 +1,80 @@
+# Benchmark: autocompletar com 1 milhão de títulos
+
+"""
+Mede o tempo de `IndicePrefixos.buscar` (05-organizando-codigo/autocompletar.py)
+com um índice grande, comparado a percorrer a lista inteira com `startswith`.
+
+Para rodar (a partir da raiz do projeto):
+    uv run python benchmarks/autocompletar.py
+    uv run python benchmarks/autocompletar.py --quantidade 100000
+"""
+
+import argparse
+import importlib.util
+import random
+import string
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def carregar_autocompletar():
+    caminho = RAIZ / "05-organizando-codigo" / "autocompletar.py"
+    spec = importlib.util.spec_from_file_location("etapa05_autocompletar", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quantidade", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=1000)
+    args = parser.parse_args()
+
+    autocompletar = carregar_autocompletar()
+    gerador = random.Random(42)
+    titulos = [
+        " ".join(
+            "".join(gerador.choices(string.ascii_lowercase, k=gerador.randint(3, 9)))
+            for _ in range(3)
+        ).title()
+        for _ in range(args.quantidade)
+    ]
+
+    indice = autocompletar.IndicePrefixos()
+    inicio = time.perf_counter()
+    indice.carregar(enumerate(titulos))
+    carga = time.perf_counter() - inicio
+
+    # Escritas incrementais com o índice já cheio (como em POST /livros/)
+    novos = gerador.sample(titulos, 1000)
+    inicio = time.perf_counter()
+    for i, titulo in enumerate(novos, start=args.quantidade):
+        indice.adicionar(i, titulo)
+    por_insercao = (time.perf_counter() - inicio) / len(novos) * 1e6
+
+    prefixos = [titulo[: gerador.randint(1, 4)] for titulo in gerador.sample(titulos, args.consultas)]
+
+    inicio = time.perf_counter()
+    for prefixo in prefixos:
+        indice.buscar(prefixo, 10)
+    por_consulta = (time.perf_counter() - inicio) / len(prefixos) * 1e6
+
+    normalizados = [autocompletar.normalizar(t) for t in titulos]
+    amostra = prefixos[:20]
+    inicio = time.perf_counter()
+    for prefixo in amostra:
+        p = autocompletar.normalizar(prefixo)
+        [t for t in normalizados if t.startswith(p)][:10]
+    varredura = (time.perf_counter() - inicio) / len(amostra) * 1e6
+
+    print(f"{args.quantidade:,} títulos (carga inicial: {carga:.1f} s)\n")
+    print(f"{'inserção incremental':<30}{por_insercao:>12.1f} µs/título")
+    print(f"{'índice de prefixos (top 10)':<30}{por_consulta:>12.1f} µs/consulta")
+    print(f"{'varredura com startswith':<30}{varredura:>12.1f} µs/consulta")
+
+
+if __name__ == "__main__":
+    main()
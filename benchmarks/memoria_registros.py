@@ -0,0 +1,115 @@
+# Benchmark: memória por registro - dict de model_dump() x registro compacto
+
+"""
+Compara quantos bytes cada registro ocupa quando guardado como o dict de
+`model_dump()` (como era antes) e no formato compacto de cada etapa:
+registros com `__slots__` nas etapas 03 e 05 e colunas NumPy na etapa 04.
+
+Para rodar (a partir da raiz do projeto):
+    uv run python benchmarks/memoria_registros.py
+    uv run python benchmarks/memoria_registros.py --quantidade 100000
+"""
+
+import argparse
+import gc
+import importlib.util
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+AUTORES = ["Luciano Ramalho", "Allen Downey", "Al Sweigart", "David Beazley"]
+CATEGORIAS = ["Eletrônicos", "Livros", "Roupas", "Casa"]
+
+
+def carregar(etapa: str, modulo: str, nome: str):
+    """Importa um módulo de uma etapa sem misturar com as outras"""
+    pasta = RAIZ / etapa
+    sys.path.insert(0, str(pasta))
+    try:
+        spec = importlib.util.spec_from_file_location(nome, pasta / f"{modulo}.py")
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        return mod
+    finally:
+        sys.path.remove(str(pasta))
+        sys.modules.pop("models", None)
+
+
+def medir(preencher, quantidade: int) -> float:
+    """Bytes alocados por registro para `quantidade` registros"""
+    gc.collect()
+    tracemalloc.start()
+    registros = preencher(quantidade)
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registros
+    gc.collect()
+    return atual / quantidade
+
+
+def copia(texto: str) -> str:
+    """
+    Cópia nova do texto, como a que sai da decodificação do JSON
+
+    `f"{texto}"` devolveria o mesmo objeto, e os registros dividiriam a string.
+    """
+    return texto.encode().decode()
+
+
+# Cada registro tem sua própria cópia de cada texto, como acontece quando o
+# JSON da requisição é decodificado.
+
+def tarefa(i):
+    return {"titulo": f"Tarefa {i}", "descricao": f"Descrição da tarefa {i}",
+            "concluida": i % 2 == 0}
+
+
+def livro(i):
+    return {"titulo": f"Livro {i}", "autor": copia(AUTORES[i % 4]), "ano": 2000 + i % 25,
+            "isbn": None, "paginas": 100 + i % 900, "disponivel": True}
+
+
+def produto(i):
+    return {"nome": f"Produto {i}", "descricao": f"Descrição do produto {i}",
+            "preco": 10.0 + i, "estoque": i % 100, "categoria": copia(CATEGORIAS[i % 4]),
+            "ativo": True, "data_criacao": datetime.now()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quantidade", type=int, default=1_000_000)
+    quantidade = parser.parse_args().quantidade
+
+    etapa03 = carregar("03-rotas-post", "main", "etapa03_main")
+    etapa04 = carregar("04-validacao-pydantic", "catalogo", "etapa04_catalogo")
+    etapa05 = carregar("05-organizando-codigo", "registros", "etapa05_registros")
+
+    def em_registros(dados, classe):
+        return lambda n: [classe(**dados(i), id=i) for i in range(n)]
+
+    def em_catalogo(n):
+        catalogo = etapa04.CatalogoProdutos()
+        for i in range(n):
+            catalogo.adicionar(produto(i))
+        return catalogo
+
+    casos = [
+        ("tarefa (03)", tarefa, em_registros(tarefa, etapa03.RegistroTarefa)),
+        ("produto (04)", produto, em_catalogo),
+        ("livro (05)", livro, em_registros(livro, etapa05.RegistroLivro)),
+    ]
+
+    print(f"{quantidade:,} registros\n")
+    print(f"{'registro':<14}{'dict':>12}{'compacto':>12}{'economia':>10}")
+    for nome, dados, compacto in casos:
+        bytes_dict = medir(lambda n: [{**dados(i), "id": i} for i in range(n)], quantidade)
+        bytes_registro = medir(compacto, quantidade)
+        economia = 1 - bytes_registro / bytes_dict
+        print(f"{nome:<14}{bytes_dict:>10.0f} B{bytes_registro:>10.0f} B{economia:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Benchmark: busca de palavras proibidas - loop com `in` x Aho-Corasick
+
+"""
+Compara o validador antigo da bio (um `palavra in texto` por palavra) com o
+autômato Aho-Corasick de `04-validacao-pydantic/moderacao.py`.
+
+Para rodar (a partir da raiz do projeto):
+    uv run python benchmarks/palavras_proibidas.py
+    uv run python benchmarks/palavras_proibidas.py --termos 50000
+"""
+
+import argparse
+import importlib.util
+import random
+import string
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def carregar_moderacao():
+    caminho = RAIZ / "04-validacao-pydantic" / "moderacao.py"
+    spec = importlib.util.spec_from_file_location("etapa04_moderacao", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def palavra_aleatoria(gerador: random.Random) -> str:
+    return "".join(gerador.choices(string.ascii_lowercase, k=gerador.randint(5, 12)))
+
+
+def abordagem_antiga(palavras: list[str], texto: str):
+    texto_lower = texto.lower()
+    for palavra in palavras:
+        if palavra in texto_lower:
+            return palavra
+    return None
+
+
+def cronometrar(funcao, textos: list[str]) -> float:
+    """Microssegundos por texto"""
+    inicio = time.perf_counter()
+    for texto in textos:
+        funcao(texto)
+    return (time.perf_counter() - inicio) / len(textos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--termos", type=int, default=10_000)
+    parser.add_argument("--textos", type=int, default=500)
+    args = parser.parse_args()
+
+    moderacao = carregar_moderacao()
+    gerador = random.Random(42)
+    palavras = [palavra_aleatoria(gerador) for _ in range(args.termos)]
+
+    # Bios de ~500 caracteres sem palavras proibidas: o pior caso do loop antigo
+    textos = [
+        " ".join(palavra_aleatoria(gerador) for _ in range(60))[:500]
+        for _ in range(args.textos)
+    ]
+
+    inicio = time.perf_counter()
+    automato = moderacao.AhoCorasick(palavras)
+    compilacao = (time.perf_counter() - inicio) * 1000
+
+    antigo = cronometrar(lambda t: abordagem_antiga(palavras, t), textos)
+    novo = cronometrar(automato.encontrar, textos)
+    novo_inteira = cronometrar(lambda t: automato.encontrar(t, True), textos)
+
+    print(f"{args.termos:,} termos, {args.textos} bios de até 500 caracteres")
+    print(f"compilação do autômato: {compilacao:.0f} ms (uma única vez)\n")
+    print(f"{'loop com in':<28}{antigo:>10.1f} µs/bio")
+    print(f"{'Aho-Corasick':<28}{novo:>10.1f} µs/bio  ({antigo / novo:.0f}x)")
+    print(f"{'Aho-Corasick palavra inteira':<28}{novo_inteira:>10.1f} µs/bio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# Módulos usados por mais de uma etapa do tutorial
+
+"""
+Código de infraestrutura (limite de taxa, idempotência, cache de listagens,
+documentação pré-gerada e rastreamento de memória) que as etapas 03, 04 e
+05 importam daqui, em vez de cada uma ter a sua cópia.
+
+Cada `main.py` coloca a raiz do projeto no `sys.path` antes de importar:
+
+    from compartilhado.limites import configurar_limites
+"""
@@ -0,0 +1,85 @@
+# Coalescência de requisições (single-flight)
+
+"""
+Quando muitos clientes pedem a mesma listagem ao mesmo tempo, não faz
+sentido percorrer o "banco de dados" e serializar o mesmo JSON várias vezes.
+
+O `GrupoCoalescencia` garante que, para uma mesma chave (caminho, query e
+versão dos dados), apenas UMA requisição execute o trabalho. As demais
+esperam e recebem os mesmos bytes já codificados.
+"""
+
+import threading
+from typing import Callable, Hashable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+class _Chamada:
+    """Uma computação em andamento, compartilhada por várias requisições"""
+
+    __slots__ = ("pronta", "resultado", "erro")
+
+    def __init__(self):
+        self.pronta = threading.Event()
+        self.resultado: bytes | None = None
+        self.erro: BaseException | None = None
+
+
+class GrupoCoalescencia:
+    """Agrupa requisições idênticas e concorrentes em uma única execução"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: dict[Hashable, _Chamada] = {}
+        self.executadas = 0
+        self.coalescidas = 0
+
+    def executar(self, chave: Hashable, funcao: Callable[[], object]) -> bytes:
+        """
+        Executa `funcao` uma única vez por chave e devolve o JSON codificado
+
+        Se outra requisição com a mesma chave já estiver em andamento,
+        apenas espera o resultado dela.
+        """
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._em_andamento[chave] = chamada
+                self.executadas += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            chamada.pronta.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = JSONResponse(jsonable_encoder(funcao())).body
+        except BaseException as erro:
+            chamada.erro = erro
+            raise
+        finally:
+            # Remove antes de liberar: quem chegar depois recalcula com dados novos
+            with self._lock:
+                del self._em_andamento[chave]
+            chamada.pronta.set()
+
+        return chamada.resultado
+
+    def metricas(self) -> dict:
+        """Contadores de execuções reais e requisições coalescidas"""
+        with self._lock:
+            total = self.executadas + self.coalescidas
+            return {
+                "requisicoes": total,
+                "executadas": self.executadas,
+                "coalescidas": self.coalescidas,
+                "em_andamento": len(self._em_andamento),
+                "taxa_coalescencia": self.coalescidas / total if total else 0.0,
+            }
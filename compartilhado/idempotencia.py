@@ -0,0 +1,141 @@
+# Chaves de idempotência para rotas POST
+
+"""
+Quando a conexão cai depois que o servidor criou o registro, o cliente não
+sabe se deu certo e tenta de novo - criando um registro duplicado.
+
+Com o header `Idempotency-Key`, o cliente manda a mesma chave em todas as
+tentativas. A primeira resposta fica guardada e é devolvida nas repetições,
+sem executar a rota de novo. Se duas tentativas chegarem ao mesmo tempo, a
+segunda espera a primeira terminar.
+
+As chaves valem por cliente (o mesmo de `limites.identificar_cliente`): dois
+clientes que escolham a mesma chave não veem a resposta um do outro.
+
+O cache é limitado: guarda no máximo `max_entradas` chaves (descartando as
+menos usadas) e cada uma expira depois de `ttl` segundos.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+from compartilhado.limites import identificar_cliente
+
+
+class _Entrada:
+    """Resposta guardada (ou ainda sendo calculada) para uma chave"""
+
+    __slots__ = ("impressao", "pronta", "resultado", "falhou", "expira_em")
+
+    def __init__(self, impressao: str, expira_em: float):
+        self.impressao = impressao
+        self.pronta = threading.Event()
+        self.resultado = None
+        self.falhou = False
+        self.expira_em = expira_em
+
+
+def impressao_digital(corpo: str) -> str:
+    """Resumo do corpo da requisição, para detectar chave reutilizada"""
+    return hashlib.sha256(corpo.encode()).hexdigest()
+
+
+class CacheIdempotencia:
+    """Cache LRU com TTL das respostas por chave de idempotência"""
+
+    def __init__(self, max_entradas: int = 10_000, ttl: float = 24 * 60 * 60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: OrderedDict[Hashable, _Entrada] = OrderedDict()
+
+    def _descartar_excedentes(self, agora: float):
+        while self._entradas:
+            chave, entrada = next(iter(self._entradas.items()))
+            if len(self._entradas) <= self.max_entradas and entrada.expira_em > agora:
+                break
+            del self._entradas[chave]
+
+    def executar(self, chave: Hashable, impressao: str, funcao: Callable[[], object]):
+        """
+        Executa `funcao` uma única vez por chave
+
+        Retorna `(resultado, repetida)`, onde `repetida` indica que o
+        resultado veio do cache. Reutilizar a chave com outro corpo
+        gera erro 422.
+        """
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                entrada = self._entradas.get(chave)
+                if entrada is not None and entrada.expira_em <= agora:
+                    del self._entradas[chave]
+                    entrada = None
+
+                if entrada is None:
+                    entrada = _Entrada(impressao, agora + self.ttl)
+                    self._entradas[chave] = entrada
+                    self._descartar_excedentes(agora)
+                    break
+
+                self._entradas.move_to_end(chave)
+
+            if entrada.impressao != impressao:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key já utilizada com outro conteúdo",
+                )
+
+            entrada.pronta.wait()
+            if not entrada.falhou:
+                return entrada.resultado, True
+            # A primeira tentativa falhou: tentamos de novo como se fosse nova
+
+        try:
+            entrada.resultado = funcao()
+        except BaseException:
+            # Erros não ficam guardados: o cliente pode tentar de novo
+            entrada.falhou = True
+            with self._lock:
+                if self._entradas.get(chave) is entrada:
+                    del self._entradas[chave]
+            raise
+        finally:
+            entrada.pronta.set()
+
+        return entrada.resultado, False
+
+    def responder(
+        self,
+        rota: str,
+        request: Request,
+        chave: str | None,
+        corpo: BaseModel,
+        response: Response,
+        funcao: Callable[[], object],
+    ):
+        """
+        Atalho para as rotas: sem chave, apenas executa `funcao`
+
+        Com chave, usa o cache e marca as respostas repetidas com o
+        header `Idempotent-Replayed: true`.
+        """
+        if chave is None:
+            return funcao()
+
+        # exclude_unset: campos gerados no servidor (ex.: datas) não contam
+        impressao = impressao_digital(corpo.model_dump_json(exclude_unset=True))
+        cliente = identificar_cliente(request)
+        resultado, repetida = self.executar((rota, cliente, chave), impressao, funcao)
+        if repetida:
+            response.headers["Idempotent-Replayed"] = "true"
+        return resultado
+
+    def __len__(self):
+        return len(self._entradas)
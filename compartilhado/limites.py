@@ -0,0 +1,177 @@
+# Limite de taxa por cliente e controle de admissão
+
+"""
+Protege a API de clientes que disparam requisições em loop.
+
+- Cada cliente tem um "balde de fichas" por classe de rota: leitura
+  (GET/HEAD, e os POST que só consultam, como `POST /livros/batch`) e
+  escrita (os demais POST/PUT/DELETE). Sem fichas, a resposta é 429 com
+  `Retry-After`.
+- Um limite global de requisições simultâneas devolve 503 imediatamente
+  quando o servidor já está ocupado, em vez de deixar a fila crescer.
+
+A memória é limitada: os baldes ficam em um OrderedDict em ordem de uso,
+e os clientes ociosos (ou os mais antigos, se passar do máximo) são
+descartados pelo início da fila - cada requisição custa O(1).
+
+O cliente é identificado pelo IP. O header `X-API-Key` só é usado quando a
+chave está na lista da variável de ambiente CHAVES_API (separadas por
+vírgula): se qualquer chave valesse, bastaria trocar de chave a cada
+requisição para ganhar um balde novo.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CHAVES_API = frozenset(
+    chave.strip() for chave in os.environ.get("CHAVES_API", "").split(",") if chave.strip()
+)
+
+
+class Balde:
+    """Balde de fichas de um cliente em uma classe de rota"""
+
+    __slots__ = ("fichas", "atualizado_em")
+
+    def __init__(self, fichas: float, agora: float):
+        self.fichas = fichas
+        self.atualizado_em = agora
+
+
+class LimitadorDeTaxa:
+    """Token bucket por (cliente, classe de rota) com expiração de ociosos"""
+
+    def __init__(
+        self,
+        limites: dict[str, tuple[int, float]],
+        max_clientes: int = 10_000,
+        ocioso_apos: float = 300.0,
+    ):
+        # limites: classe -> (capacidade do balde, fichas repostas por segundo)
+        self.limites = limites
+        self.max_clientes = max_clientes
+        self.ocioso_apos = ocioso_apos
+        self._baldes: OrderedDict[tuple[str, str], Balde] = OrderedDict()
+
+    def _expirar(self, agora: float):
+        """Remove pelo início da fila os baldes ociosos ou excedentes"""
+        while self._baldes:
+            chave, balde = next(iter(self._baldes.items()))
+            ocioso = agora - balde.atualizado_em > self.ocioso_apos
+            if not ocioso and len(self._baldes) <= self.max_clientes:
+                break
+            del self._baldes[chave]
+
+    def consumir(self, cliente: str, classe: str) -> float:
+        """
+        Tenta consumir uma ficha
+
+        Retorna 0 se a requisição pode seguir, ou quantos segundos o
+        cliente deve esperar até ter uma ficha de novo.
+        """
+        capacidade, por_segundo = self.limites[classe]
+        agora = time.monotonic()
+        chave = (cliente, classe)
+
+        balde = self._baldes.get(chave)
+        if balde is None:
+            balde = Balde(capacidade, agora)
+            self._baldes[chave] = balde
+        else:
+            self._baldes.move_to_end(chave)
+            decorrido = agora - balde.atualizado_em
+            balde.fichas = min(capacidade, balde.fichas + decorrido * por_segundo)
+            balde.atualizado_em = agora
+
+        self._expirar(agora)
+
+        if balde.fichas >= 1:
+            balde.fichas -= 1
+            return 0.0
+        return (1 - balde.fichas) / por_segundo
+
+    def __len__(self):
+        return len(self._baldes)
+
+
+def classe_da_rota(
+    metodo: str, caminho: str, rotas_leitura: frozenset[tuple[str, str]] = frozenset()
+) -> str:
+    """
+    Agrupa as rotas em classes com limites próprios
+
+    Pelo método HTTP, exceto as rotas de `rotas_leitura` - pares (método,
+    caminho) que não alteram dados apesar do método, como um POST de consulta.
+    """
+    if metodo in ("GET", "HEAD", "OPTIONS") or (metodo, caminho) in rotas_leitura:
+        return "leitura"
+    return "escrita"
+
+
+def identificar_cliente(request: Request) -> str:
+    """Usa a chave de API quando ela está em CHAVES_API, senão o IP do cliente"""
+    chave = request.headers.get("x-api-key")
+    if chave in CHAVES_API:
+        return f"chave:{chave}"
+    return f"ip:{request.client.host if request.client else 'desconhecido'}"
+
+
+def configurar_limites(
+    app: FastAPI,
+    leitura: tuple[int, float] = (60, 20.0),
+    escrita: tuple[int, float] = (10, 2.0),
+    rotas_leitura: frozenset[tuple[str, str]] = frozenset(),
+    max_simultaneas: int = 64,
+    max_clientes: int = 10_000,
+    ocioso_apos: float = 300.0,
+) -> LimitadorDeTaxa:
+    """
+    Registra o middleware de limite de taxa e admissão no app
+
+    - **leitura** / **escrita**: (capacidade, fichas por segundo) de cada classe
+    - **rotas_leitura**: pares (método, caminho) contados como leitura
+      mesmo com POST, como `("POST", "/livros/batch")`
+    - **max_simultaneas**: requisições em andamento antes de responder 503
+    """
+    limitador = LimitadorDeTaxa(
+        {"leitura": leitura, "escrita": escrita},
+        max_clientes=max_clientes,
+        ocioso_apos=ocioso_apos,
+    )
+    em_andamento = 0
+
+    @app.middleware("http")
+    async def limitar_requisicoes(request: Request, call_next):
+        nonlocal em_andamento
+
+        # Admissão: recusa rápido quando o servidor já está cheio
+        if em_andamento >= max_simultaneas:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Servidor ocupado, tente novamente"},
+                headers={"Retry-After": "1"},
+            )
+
+        espera = limitador.consumir(
+            identificar_cliente(request),
+            classe_da_rota(request.method, request.url.path, rotas_leitura),
+        )
+        if espera:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Muitas requisições, aguarde um pouco"},
+                headers={"Retry-After": str(math.ceil(espera))},
+            )
+
+        em_andamento += 1
+        try:
+            return await call_next(request)
+        finally:
+            em_andamento -= 1
+
+    return limitador
@@ -0,0 +1,274 @@
+# Rastreamento de memória por rota (tracemalloc)
+
+"""
+Ajuda a descobrir quais rotas mais alocam memória - por exemplo, listagens
+grandes que montam muitos dicts de uma vez.
+
+Desligado por padrão, pois o `tracemalloc` deixa todas as alocações mais
+lentas. Para ligar:
+
+    RASTREAR_MEMORIA=1 uv run fastapi dev 05-organizando-codigo/main.py
+
+(vale também para a etapa 04).
+
+Só uma a cada `RASTREAR_MEMORIA_AMOSTRAGEM` requisições (padrão: 10) é
+medida, e nunca duas ao mesmo tempo. A medição só lê dois contadores do
+tracemalloc, então custa o mesmo com 10 ou com 1 milhão de registros:
+
+- pico: quanto a memória subiu no pior momento da requisição (inclui os
+  objetos temporários, como os dicts de uma listagem já enviada)
+- retido: quanto a memória ficou maior depois da requisição, em bytes
+- variação de blocos: quantos blocos vivos o interpretador tem a mais (ou a
+  menos) depois da requisição. É um saldo, não o número de alocações: uma
+  requisição que libera um cache pode dar um valor negativo
+
+Como o tracemalloc mede o processo inteiro, requisições simultâneas não
+amostradas também entram na conta: os números são uma aproximação.
+
+Quais LINHAS de código alocam só aparece no snapshot sob demanda, que
+percorre toda a memória rastreada e por isso roda fora do event loop.
+
+Rotas de administração (exigem o header `X-Admin-Token` igual a
+RASTREAR_MEMORIA_TOKEN; sem token configurado, só aceitam localhost):
+- GET /admin/memoria: rotas que mais alocam e locais do último snapshot
+- POST /admin/memoria/snapshot: diferença em relação ao snapshot anterior
+"""
+
+import os
+import secrets
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+PREFIXO_ADMIN = "/admin/memoria"
+
+# Raiz do projeto: as alocações são atribuídas à linha mais recente daqui
+RAIZ = str(Path(__file__).resolve().parent.parent)
+
+# Os próprios snapshots e as estatísticas daqui não devem aparecer nas medições
+IGNORADOS = {tracemalloc.__file__, __file__}
+
+# Alocações sem nenhuma linha do projeto na pilha (Python, Starlette...)
+FORA_DO_PROJETO = "(fora do projeto)"
+
+# Requisições sem rota (404, ou barradas antes pelo limite de taxa) ficam todas
+# juntas: agrupar pela URL deixaria qualquer varredura crescer o dict de rotas
+SEM_ROTA = "(sem rota)"
+
+CLIENTES_LOCAIS = {"127.0.0.1", "::1"}
+
+
+def _do_projeto(arquivo: str) -> bool:
+    return arquivo.startswith(RAIZ) and "site-packages" not in arquivo
+
+
+def local_da_alocacao(traceback: tracemalloc.Traceback) -> str:
+    """
+    Linha do projeto que fez a alocação
+
+    O quadro mais recente costuma estar no Python, no Starlette ou no
+    Pydantic; sobe a pilha até achar código do tutorial.
+    """
+    for quadro in reversed(traceback):
+        if _do_projeto(quadro.filename):
+            return f"{quadro.filename[len(RAIZ) + 1:]}:{quadro.lineno}"
+    return FORA_DO_PROJETO
+
+
+def totais_por_local(snapshot: tracemalloc.Snapshot) -> dict[str, tuple[int, int]]:
+    """Bytes e blocos vivos somados por linha do projeto"""
+    totais: dict[str, tuple[int, int]] = {}
+    # Descarta grupos inteiros: filter_traces() testaria cada alocação, bem mais lento
+    for estatistica in snapshot.statistics("traceback"):
+        if any(quadro.filename in IGNORADOS for quadro in estatistica.traceback):
+            continue
+        local = local_da_alocacao(estatistica.traceback)
+        tamanho, blocos = totais.get(local, (0, 0))
+        totais[local] = (tamanho + estatistica.size, blocos + estatistica.count)
+    return totais
+
+
+class EstatisticasRota:
+    """Números acumulados das requisições amostradas de uma rota"""
+
+    __slots__ = ("amostras", "pico_maximo", "pico_total", "bytes_retidos", "variacao_blocos")
+
+    def __init__(self):
+        self.amostras = 0
+        self.pico_maximo = 0
+        self.pico_total = 0
+        self.bytes_retidos = 0
+        self.variacao_blocos = 0
+
+    def para_dict(self, rota: str) -> dict:
+        return {
+            "rota": rota,
+            "amostras": self.amostras,
+            "pico_maximo_bytes": self.pico_maximo,
+            "pico_medio_bytes": self.pico_total // self.amostras,
+            "retido_medio_bytes": self.bytes_retidos // self.amostras,
+            # Saldo de blocos vivos (pode ser negativo), não uma contagem de alocações
+            "variacao_media_blocos": round(self.variacao_blocos / self.amostras),
+        }
+
+
+class RastreadorDeMemoria:
+    """Guarda as medições por rota e o último snapshot"""
+
+    def __init__(self):
+        self.ativo = False
+        self.amostragem = 10
+        self.rotas: dict[str, EstatisticasRota] = {}
+        self.locais: list[dict] = []  # do último snapshot
+        self._requisicoes = 0
+        self._medindo = False
+        self._lock_snapshot = threading.Lock()
+        # Totais (bytes, blocos) por local no snapshot anterior
+        self._totais_anteriores: Optional[dict[str, tuple[int, int]]] = None
+
+    def ativar(self, amostragem: int = 10, quadros: int = 10):
+        self.ativo = True
+        self.amostragem = max(1, amostragem)
+        if not tracemalloc.is_tracing():
+            # Vários quadros por alocação: o da aplicação raramente é o último
+            tracemalloc.start(quadros)
+
+    def deve_medir(self) -> bool:
+        self._requisicoes += 1
+        return not self._medindo and self._requisicoes % self.amostragem == 0
+
+    def registrar(self, rota: str, pico: int, bytes_retidos: int, variacao_blocos: int):
+        estatisticas = self.rotas.setdefault(rota, EstatisticasRota())
+        estatisticas.amostras += 1
+        estatisticas.pico_maximo = max(estatisticas.pico_maximo, pico)
+        estatisticas.pico_total += pico
+        estatisticas.bytes_retidos += bytes_retidos
+        estatisticas.variacao_blocos += variacao_blocos
+
+    def resumo(self, limite: int = 10) -> dict:
+        atual, pico = tracemalloc.get_traced_memory()
+        rotas = sorted(self.rotas.items(), key=lambda item: item[1].pico_maximo, reverse=True)
+        return {
+            "ativo": self.ativo,
+            "amostragem": self.amostragem,
+            "requisicoes": self._requisicoes,
+            "memoria_atual_bytes": atual,
+            "pico_bytes": pico,
+            "rotas": [estatisticas.para_dict(rota) for rota, estatisticas in rotas[:limite]],
+            "locais": self.locais[:limite],
+        }
+
+    def diferenca_snapshot(self, limite: int = 20) -> dict:
+        """
+        Compara com o snapshot anterior, que passa a ser o atual
+
+        Percorre toda a memória rastreada: é lento com muitos registros e
+        deve rodar em uma thread, nunca no event loop.
+        """
+        with self._lock_snapshot:
+            totais = totais_por_local(tracemalloc.take_snapshot())
+            anteriores, self._totais_anteriores = self._totais_anteriores, totais
+            if anteriores is None:
+                return {"primeiro_snapshot": True, "locais": []}
+
+            diferencas = []
+            for local in totais.keys() | anteriores.keys():
+                tamanho, blocos = totais.get(local, (0, 0))
+                tamanho_antes, blocos_antes = anteriores.get(local, (0, 0))
+                if tamanho != tamanho_antes or blocos != blocos_antes:
+                    diferencas.append(
+                        {"local": local, "bytes": tamanho - tamanho_antes,
+                         "blocos": blocos - blocos_antes}
+                    )
+            diferencas.sort(key=lambda d: d["bytes"], reverse=True)
+
+            self.locais = diferencas[:limite]
+            return {"primeiro_snapshot": False, "locais": self.locais}
+
+
+rastreador = RastreadorDeMemoria()
+
+
+def configurar_rastreamento(app: FastAPI) -> bool:
+    """Liga o rastreamento se RASTREAR_MEMORIA=1; retorna se foi ligado"""
+    if os.environ.get("RASTREAR_MEMORIA") != "1":
+        return False
+
+    rastreador.ativar(int(os.environ.get("RASTREAR_MEMORIA_AMOSTRAGEM", "10")))
+
+    @app.middleware("http")
+    async def medir_memoria(request: Request, call_next):
+        if request.url.path.startswith(PREFIXO_ADMIN) or not rastreador.deve_medir():
+            return await call_next(request)
+
+        rastreador._medindo = True
+        try:
+            inicio, _ = tracemalloc.get_traced_memory()
+            blocos_inicio = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+
+            response = await call_next(request)
+
+            fim, pico = tracemalloc.get_traced_memory()
+            blocos_fim = sys.getallocatedblocks()
+        finally:
+            rastreador._medindo = False
+
+        # A rota "modelo" (ex.: /livros/{livro_id}) agrupa melhor que a URL
+        rota = request.scope.get("route")
+        nome = f"{request.method} {rota.path if rota else SEM_ROTA}"
+        rastreador.registrar(
+            nome, max(0, pico - inicio), fim - inicio, blocos_fim - blocos_inicio
+        )
+        return response
+
+    return True
+
+
+# ===== ROTAS DE ADMINISTRAÇÃO =====
+
+def autorizar_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Exige o token de RASTREAR_MEMORIA_TOKEN ou, sem ele, acesso local"""
+    token = os.environ.get("RASTREAR_MEMORIA_TOKEN")
+    if token:
+        # Em bytes: com str, compare_digest recusa (TypeError) textos não ASCII
+        autorizado = x_admin_token is not None and secrets.compare_digest(
+            x_admin_token.encode(), token.encode()
+        )
+    else:
+        autorizado = request.client is not None and request.client.host in CLIENTES_LOCAIS
+    if not autorizado:
+        raise HTTPException(status_code=403, detail="Acesso restrito à administração")
+
+    if not rastreador.ativo:
+        raise HTTPException(
+            status_code=409,
+            detail="Rastreamento de memória desligado; inicie com RASTREAR_MEMORIA=1"
+        )
+
+
+router_admin = APIRouter(
+    prefix=PREFIXO_ADMIN, tags=["admin"], dependencies=[Depends(autorizar_admin)]
+)
+
+
+@router_admin.get("")
+async def resumo_memoria(limite: int = 10):
+    """Rotas que mais alocam memória e os locais do último snapshot"""
+    return rastreador.resumo(limite)
+
+
+@router_admin.post("/snapshot")
+async def snapshot_memoria(limite: int = 20):
+    """
+    Tira um snapshot da memória e compara com o anterior
+
+    Chame uma vez, faça as requisições suspeitas e chame de novo: a
+    resposta mostra as linhas do projeto cuja memória mais cresceu.
+    """
+    return await run_in_threadpool(rastreador.diferenca_snapshot, limite)
@@ -0,0 +1,114 @@
+# Schema OpenAPI pré-gerado
+
+"""
+O FastAPI monta o schema OpenAPI (usado pelo /docs) na primeira vez que
+alguém acessa `/openapi.json`, percorrendo todas as rotas e modelos. Em um
+servidor recém-iniciado isso deixa a primeira requisição lenta.
+
+Com `OPENAPI_PRECOMPUTADO=1`, o app usa o arquivo `openapi.json` da etapa,
+gerado antes do deploy por `scripts/gerar_openapi.py`. O schema, a página do
+/docs e a do /redoc são servidos como bytes prontos, com versão comprimida
+em gzip e `ETag` (o navegador recebe 304 se já tiver a versão atual).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from fastapi import FastAPI, Request, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+
+
+def gerar_openapi(app: FastAPI) -> bytes:
+    """Schema do app no formato gravado em openapi.json"""
+    return (json.dumps(app.openapi(), indent=2, ensure_ascii=False) + "\n").encode()
+
+
+def aceita_gzip(accept_encoding: str) -> bool:
+    """Se o header Accept-Encoding permite gzip (`gzip;q=0` recusa)"""
+    qualidades = {}
+    for item in accept_encoding.split(","):
+        codificacao, _, parametros = item.partition(";")
+        qualidade = 1.0
+        for parametro in parametros.split(";"):
+            nome, _, valor = parametro.strip().partition("=")
+            if nome.lower() == "q":
+                try:
+                    qualidade = float(valor)
+                except ValueError:
+                    qualidade = 0.0
+        qualidades[codificacao.strip().lower()] = qualidade
+    return qualidades.get("gzip", qualidades.get("*", 0.0)) > 0
+
+
+def etag_combina(if_none_match: str, etag: str) -> bool:
+    """Se o header If-None-Match (lista, `W/"..."` ou `*`) inclui a ETag"""
+    for item in if_none_match.split(","):
+        item = item.strip()
+        if item == "*" or item.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ConteudoPreCodificado:
+    """Bytes prontos para envio, com versão gzip e ETag"""
+
+    def __init__(self, conteudo: bytes, media_type: str):
+        self.conteudo = conteudo
+        self.comprimido = gzip.compress(conteudo, compresslevel=9)
+        self.media_type = media_type
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()[:32]
+        self.etag = f'"{hash_conteudo}"'
+        # Bytes diferentes, ETag diferente: caches não trocam uma versão pela outra
+        self.etag_gzip = f'"{hash_conteudo}-gzip"'
+
+    async def responder(self, request: Request) -> Response:
+        comprimir = aceita_gzip(request.headers.get("accept-encoding", ""))
+        etag = self.etag_gzip if comprimir else self.etag
+        cabecalhos = {"ETag": etag, "Vary": "Accept-Encoding"}
+        if etag_combina(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=cabecalhos)
+
+        if comprimir:
+            cabecalhos["Content-Encoding"] = "gzip"
+            return Response(self.comprimido, media_type=self.media_type, headers=cabecalhos)
+        return Response(self.conteudo, media_type=self.media_type, headers=cabecalhos)
+
+
+def usar_openapi_precomputado(app: FastAPI, arquivo: Path) -> bool:
+    """
+    Troca as rotas de documentação por versões pré-codificadas
+
+    Só age quando a variável de ambiente OPENAPI_PRECOMPUTADO=1 está
+    definida; retorna se o modo foi ativado. Deve ser chamada depois de
+    todas as rotas terem sido registradas.
+    """
+    if os.environ.get("OPENAPI_PRECOMPUTADO") != "1" or not app.openapi_url:
+        return False
+
+    schema = arquivo.read_bytes()
+    # app.openapi() passa a devolver o schema do arquivo, sem gerar nada
+    app.openapi_schema = json.loads(schema)
+
+    paginas = {app.openapi_url: ConteudoPreCodificado(schema, "application/json")}
+    if app.docs_url:
+        html = get_swagger_ui_html(
+            openapi_url=app.openapi_url,
+            title=f"{app.title} - Swagger UI",
+            oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
+            init_oauth=app.swagger_ui_init_oauth,
+            swagger_ui_parameters=app.swagger_ui_parameters,
+        )
+        paginas[app.docs_url] = ConteudoPreCodificado(html.body, "text/html")
+    if app.redoc_url:
+        html = get_redoc_html(openapi_url=app.openapi_url, title=f"{app.title} - ReDoc")
+        paginas[app.redoc_url] = ConteudoPreCodificado(html.body, "text/html")
+
+    app.router.routes = [
+        rota for rota in app.router.routes if getattr(rota, "path", None) not in paginas
+    ]
+    for caminho, pagina in paginas.items():
+        app.add_route(caminho, pagina.responder, include_in_schema=False)
+    return True
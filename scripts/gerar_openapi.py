@@ -0,0 +1,72 @@
+# Gera (ou confere) o openapi.json de cada etapa
+
+"""
+Pré-gera o schema OpenAPI das etapas 03, 04 e 05 para que o servidor não
+precise montá-lo na primeira requisição (ver `compartilhado/openapi_cache.py`
+e a variável OPENAPI_PRECOMPUTADO).
+
+Uso (a partir da raiz do projeto):
+    uv run python scripts/gerar_openapi.py             # grava os arquivos
+    uv run python scripts/gerar_openapi.py --verificar # falha se estiverem desatualizados
+
+O modo `--verificar` serve como teste no CI: retorna código 1 se algum
+openapi.json gravado for diferente do schema gerado pelo app atual.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+ETAPAS = ["03-rotas-post", "04-validacao-pydantic", "05-organizando-codigo"]
+
+
+def schema_da_etapa(etapa: str) -> tuple[Path, bytes]:
+    """Importa o app da etapa e devolve (caminho do openapi.json, schema atual)"""
+    pasta = RAIZ / etapa
+    modulos_antes = set(sys.modules)
+    sys.path.insert(0, str(pasta))
+    try:
+        import main
+        from compartilhado.openapi_cache import gerar_openapi
+
+        return pasta / "openapi.json", gerar_openapi(main.app)
+    finally:
+        sys.path.remove(str(pasta))
+        # Cada etapa tem seus próprios main.py, models.py...: não podem se misturar
+        for nome in set(sys.modules) - modulos_antes:
+            del sys.modules[nome]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--verificar", action="store_true",
+                        help="não grava; falha se algum arquivo estiver desatualizado")
+    parser.add_argument("etapas", nargs="*", default=ETAPAS)
+    args = parser.parse_args()
+
+    # O schema precisa vir das rotas, nunca do próprio arquivo
+    os.environ.pop("OPENAPI_PRECOMPUTADO", None)
+
+    desatualizadas = []
+    for etapa in args.etapas:
+        arquivo, schema = schema_da_etapa(etapa)
+        atual = arquivo.read_bytes() if arquivo.exists() else None
+
+        if args.verificar:
+            situacao = "ok" if atual == schema else "DESATUALIZADO"
+            if atual != schema:
+                desatualizadas.append(etapa)
+        else:
+            arquivo.write_bytes(schema)
+            situacao = "sem mudanças" if atual == schema else "gravado"
+        print(f"{etapa}/{arquivo.name}: {situacao}")
+
+    if desatualizadas:
+        print("\nRode `uv run python scripts/gerar_openapi.py` e faça commit dos arquivos.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()